@@ -0,0 +1,320 @@
+import asyncio
+from collections import deque
+from typing import Optional
+from fastapi import Request
+from app.core.config import settings
+from app.core.security import authenticate_request
+
+
+# Bucket único para requisições sem credenciais válidas
+ANONYMOUS_TENANT = "anonymous"
+
+
+class AdmissionRejected(Exception):
+    """
+    Requisição descartada pelo controle de admissão (deve virar 503 com Retry-After)
+    """
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    """
+    Reserva de orçamento de uma requisição (bytes em memória e segundos de áudio)
+    """
+
+    def __init__(self, tenant: str, memory_bytes: int, audio_seconds: float):
+        self.tenant = tenant
+        self.memory_bytes = memory_bytes
+        self.audio_seconds = audio_seconds
+        self.future: Optional[asyncio.Future] = None
+
+
+class AdmissionController:
+    """
+    Controle de admissão baseado em orçamento global de memória e segundos de áudio em processamento
+
+    A decisão é tomada a partir do Content-Length declarado, antes de ler o corpo da requisição.
+    Requisições que não cabem no orçamento aguardam em filas por tenant (claim `sub` do JWT),
+    atendidas em round-robin, até o prazo configurado. Excesso de carga é descartado cedo:
+    cada tenant tem um limite próprio de fila e, com a fila global cheia, é descartada a
+    requisição mais recente do tenant com a maior fila (não a do tenant que chegou depois).
+    Requisições anônimas dividem um único bucket com limite pequeno (fila + em processamento).
+    """
+
+    def __init__(
+        self,
+        max_inflight_bytes: int,
+        max_inflight_audio_seconds: float,
+        memory_multiplier: float,
+        audio_bytes_per_second: int,
+        max_queue_depth: int,
+        max_queue_per_tenant: int,
+        max_anonymous: int,
+        queue_timeout: float,
+        retry_after: int,
+        max_body_size: int
+    ):
+        self.max_inflight_bytes = max_inflight_bytes
+        self.max_inflight_audio_seconds = max_inflight_audio_seconds
+        self.memory_multiplier = memory_multiplier
+        self.audio_bytes_per_second = audio_bytes_per_second
+        self.max_queue_depth = max_queue_depth
+        self.max_queue_per_tenant = max_queue_per_tenant
+        self.max_anonymous = max_anonymous
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.max_body_size = max_body_size
+
+        self.inflight_bytes = 0
+        self.inflight_audio_seconds = 0.0
+        self.inflight_requests = 0
+        self.inflight_anonymous = 0
+
+        # Filas por tenant e ordem de atendimento round-robin
+        self._queues: dict[str, deque] = {}
+        self._rotation: deque = deque()
+        self.queue_depth = 0
+
+        # Contadores expostos em /transcription/admission
+        self.admitted_total = 0
+        self.shed_total = 0
+        self.shed_queue_full = 0
+        self.shed_tenant_limit = 0
+        self.shed_anonymous = 0
+        self.shed_timeout = 0
+
+    def _estimate(self, content_length: Optional[int]) -> tuple[int, float]:
+        """
+        Estima o custo da requisição a partir do Content-Length declarado
+
+        O corpo, a string base64, os bytes decodificados e a cópia comprimida
+        coexistem em memória, por isso o tamanho é multiplicado.
+        Sem Content-Length (chunked), assume o pior caso (limite do corpo).
+        """
+        body_size = content_length if content_length is not None else self.max_body_size
+        body_size = min(body_size, self.max_body_size)
+
+        memory_bytes = int(body_size * self.memory_multiplier)
+        audio_seconds = body_size / self.audio_bytes_per_second
+
+        # Uma única requisição nunca pode exceder o orçamento total (senão nunca seria admitida)
+        memory_bytes = min(memory_bytes, self.max_inflight_bytes)
+        audio_seconds = min(audio_seconds, self.max_inflight_audio_seconds)
+
+        return memory_bytes, audio_seconds
+
+    def _fits(self, ticket: _Ticket) -> bool:
+        if self.inflight_requests == 0:
+            return True
+        return (
+            self.inflight_bytes + ticket.memory_bytes <= self.max_inflight_bytes
+            and self.inflight_audio_seconds + ticket.audio_seconds <= self.max_inflight_audio_seconds
+        )
+
+    def _grant(self, ticket: _Ticket) -> None:
+        self.inflight_bytes += ticket.memory_bytes
+        self.inflight_audio_seconds += ticket.audio_seconds
+        self.inflight_requests += 1
+        if ticket.tenant == ANONYMOUS_TENANT:
+            self.inflight_anonymous += 1
+        self.admitted_total += 1
+
+    def _enqueue(self, ticket: _Ticket) -> None:
+        queue = self._queues.get(ticket.tenant)
+        if queue is None:
+            queue = deque()
+            self._queues[ticket.tenant] = queue
+            self._rotation.append(ticket.tenant)
+        queue.append(ticket)
+        self.queue_depth += 1
+
+    def _remove(self, ticket: _Ticket) -> None:
+        queue = self._queues.get(ticket.tenant)
+        if queue is None or ticket not in queue:
+            return
+        queue.remove(ticket)
+        self.queue_depth -= 1
+        if not queue:
+            del self._queues[ticket.tenant]
+            self._rotation.remove(ticket.tenant)
+
+    def _shed(self, counter: str, reason: str) -> AdmissionRejected:
+        self.shed_total += 1
+        setattr(self, counter, getattr(self, counter) + 1)
+        return AdmissionRejected(reason, self.retry_after)
+
+    def _evict_from_largest_queue(self, tenant: str) -> bool:
+        """
+        Com a fila global cheia, descarta a requisição mais recente do tenant com a maior fila,
+        desde que ela seja maior que a fila que o tenant atual teria após entrar
+
+        Returns:
+            bool: True se uma vaga foi liberada
+        """
+        own_depth = len(self._queues.get(tenant, ()))
+        largest = max(self._queues, key=lambda name: len(self._queues[name]))
+        if largest == tenant or len(self._queues[largest]) <= own_depth + 1:
+            return False
+
+        victim = self._queues[largest][-1]
+        self._remove(victim)
+        victim.future.set_exception(self._shed("shed_queue_full", "Fila de admissão cheia"))
+        return True
+
+    def _dispatch(self) -> None:
+        """
+        Libera requisições enfileiradas em round-robin entre tenants enquanto houver orçamento
+
+        O próximo tenant da rotação bloqueia os demais se sua requisição não couber,
+        evitando que uploads grandes sejam preteridos indefinidamente por pequenos.
+        """
+        while self._rotation:
+            tenant = self._rotation[0]
+            queue = self._queues[tenant]
+            ticket = queue[0]
+
+            if not self._fits(ticket):
+                return
+
+            queue.popleft()
+            self.queue_depth -= 1
+            self._rotation.popleft()
+            if queue:
+                self._rotation.append(tenant)
+            else:
+                del self._queues[tenant]
+
+            self._grant(ticket)
+            if not ticket.future.done():
+                ticket.future.set_result(True)
+
+    async def acquire(self, tenant: str, content_length: Optional[int]) -> _Ticket:
+        """
+        Reserva orçamento para a requisição, aguardando na fila do tenant se necessário
+
+        Raises:
+            AdmissionRejected: Se a fila estiver cheia ou o prazo de espera expirar
+        """
+        memory_bytes, audio_seconds = self._estimate(content_length)
+        ticket = _Ticket(tenant, memory_bytes, audio_seconds)
+
+        queued = len(self._queues.get(tenant, ()))
+
+        # Bucket anônimo: limite pequeno somando fila e requisições em processamento
+        if tenant == ANONYMOUS_TENANT and self.inflight_anonymous + queued >= self.max_anonymous:
+            raise self._shed("shed_anonymous", "Limite de requisições sem autenticação atingido")
+
+        # Caminho rápido: ninguém na fila e há orçamento disponível
+        if not self._rotation and self._fits(ticket):
+            self._grant(ticket)
+            return ticket
+
+        # Descarte antecipado: tenant acima da sua cota de fila
+        if queued >= self.max_queue_per_tenant:
+            raise self._shed("shed_tenant_limit", "Fila de admissão do usuário cheia")
+
+        # Descarte antecipado: fila global cheia e nenhum tenant acima da parte justa
+        if self.queue_depth >= self.max_queue_depth and not self._evict_from_largest_queue(tenant):
+            raise self._shed("shed_queue_full", "Fila de admissão cheia")
+
+        ticket.future = asyncio.get_running_loop().create_future()
+        self._enqueue(ticket)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.future), timeout=self.queue_timeout)
+            return ticket
+        except AdmissionRejected:
+            # Descartada por outro tenant com fila menor (ver _evict_from_largest_queue)
+            raise
+        except asyncio.TimeoutError:
+            if ticket.future.done():
+                # Admitida (ou descartada) exatamente no limite do prazo
+                ticket.future.result()
+                return ticket
+            self._remove(ticket)
+            self._dispatch()
+            raise self._shed("shed_timeout", "Tempo de espera na fila de admissão esgotado")
+        except asyncio.CancelledError:
+            # Cliente desconectou enquanto aguardava
+            if not ticket.future.done():
+                self._remove(ticket)
+                self._dispatch()
+            elif ticket.future.exception() is None:
+                self.release(ticket)
+            raise
+
+    def release(self, ticket: _Ticket) -> None:
+        """
+        Devolve o orçamento reservado e libera as próximas requisições da fila
+        """
+        self.inflight_bytes -= ticket.memory_bytes
+        self.inflight_audio_seconds -= ticket.audio_seconds
+        self.inflight_requests -= 1
+        if ticket.tenant == ANONYMOUS_TENANT:
+            self.inflight_anonymous -= 1
+        self._dispatch()
+
+    def stats(self) -> dict:
+        """
+        Retorna métricas do controle de admissão
+        """
+        return {
+            "inflight_requests": self.inflight_requests,
+            "inflight_bytes": self.inflight_bytes,
+            "inflight_audio_seconds": round(self.inflight_audio_seconds, 2),
+            "max_inflight_bytes": self.max_inflight_bytes,
+            "max_inflight_audio_seconds": self.max_inflight_audio_seconds,
+            "queue_depth": self.queue_depth,
+            "queued_tenants": len(self._queues),
+            "admitted_total": self.admitted_total,
+            "shed_total": self.shed_total,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_tenant_limit": self.shed_tenant_limit,
+            "shed_anonymous": self.shed_anonymous,
+            "shed_timeout": self.shed_timeout,
+        }
+
+
+def request_tenant(request: Request) -> str:
+    """
+    Identifica o tenant pela API key ou pelo token JWT, ambos verificados
+
+    A verificação do JWT usa o cache de tokens verificados, então é barata na maioria das
+    requisições. Sem credenciais válidas, a requisição vai para o bucket anônimo.
+    """
+    payload = authenticate_request(request)
+    if payload is None:
+        return ANONYMOUS_TENANT
+    return str(payload["sub"])
+
+
+def request_content_length(request: Request) -> Optional[int]:
+    """
+    Retorna o Content-Length declarado ou None se ausente/inválido
+    """
+    value = request.headers.get("content-length")
+    if value is None:
+        return None
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        return None
+
+
+# Instância singleton do controle de admissão
+admission_controller = AdmissionController(
+    max_inflight_bytes=settings.ADMISSION_MAX_INFLIGHT_MB * 1024 * 1024,
+    max_inflight_audio_seconds=settings.ADMISSION_MAX_INFLIGHT_AUDIO_SECONDS,
+    memory_multiplier=settings.ADMISSION_MEMORY_MULTIPLIER,
+    audio_bytes_per_second=settings.ADMISSION_AUDIO_BYTES_PER_SECOND,
+    max_queue_depth=settings.ADMISSION_MAX_QUEUE_DEPTH,
+    max_queue_per_tenant=settings.ADMISSION_MAX_QUEUE_PER_TENANT,
+    max_anonymous=settings.ADMISSION_MAX_ANONYMOUS,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    max_body_size=150 * 1024 * 1024
+)
@@ -0,0 +1,143 @@
+import hashlib
+import secrets
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from app.core.config import settings
+
+
+API_KEY_PREFIX = "tk"
+
+# Prefixo do `sub` de clientes autenticados por API key (separa-os dos usuários JWT)
+API_KEY_SUBJECT_PREFIX = "key:"
+
+
+class ApiKeyStore:
+    """
+    Armazenamento local de API keys de longa duração para clientes máquina
+
+    Apenas o SHA-256 de cada key é persistido (SQLite). As keys ativas ficam em um
+    dicionário em memória (hash -> client_id), consultado em tempo constante e
+    recarregado periodicamente para refletir revogações feitas por outros workers.
+    """
+
+    def __init__(self, db_path: str, refresh_interval: float = 30.0):
+        self.db_path = db_path
+        self.refresh_interval = refresh_interval
+
+        self._keys: dict[bytes, str] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS api_keys ("
+                "key_id TEXT PRIMARY KEY, "
+                "key_hash BLOB NOT NULL UNIQUE, "
+                "client_id TEXT NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "revoked_at REAL)"
+            )
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    @staticmethod
+    def _hash(api_key: str) -> bytes:
+        return hashlib.sha256(api_key.encode()).digest()
+
+    def _reload(self) -> None:
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT key_hash, client_id FROM api_keys WHERE revoked_at IS NULL").fetchall()
+        finally:
+            conn.close()
+        self._keys = {bytes(row["key_hash"]): row["client_id"] for row in rows}
+        self._loaded_at = time.monotonic()
+
+    def lookup(self, api_key: str) -> Optional[str]:
+        """
+        Retorna o client_id dono da API key ou None se ela não existir/estiver revogada
+        """
+        if not api_key.startswith(f"{API_KEY_PREFIX}_"):
+            return None
+
+        if time.monotonic() - self._loaded_at > self.refresh_interval:
+            with self._lock:
+                if time.monotonic() - self._loaded_at > self.refresh_interval:
+                    self._reload()
+
+        return self._keys.get(self._hash(api_key))
+
+    def create(self, client_id: str) -> dict:
+        """
+        Gera uma nova API key para o cliente (o valor em texto só é devolvido aqui)
+
+        Raises:
+            ValueError: Se o client_id coincidir com o usuário admin
+        """
+        if client_id == settings.ADMIN_USERNAME:
+            raise ValueError("O client_id não pode ser igual ao usuário admin")
+
+        key_id = secrets.token_hex(4)
+        api_key = f"{API_KEY_PREFIX}_{key_id}_{secrets.token_urlsafe(32)}"
+        created_at = time.time()
+
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT INTO api_keys (key_id, key_hash, client_id, created_at) VALUES (?, ?, ?, ?)",
+                    (key_id, self._hash(api_key), client_id, created_at)
+                )
+                conn.commit()
+            finally:
+                conn.close()
+            self._reload()
+
+        return {"key_id": key_id, "client_id": client_id, "api_key": api_key, "created_at": created_at}
+
+    def list_keys(self) -> list[dict]:
+        """
+        Lista as API keys ativas (sem o valor da key)
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT key_id, client_id, created_at FROM api_keys WHERE revoked_at IS NULL ORDER BY created_at"
+            ).fetchall()
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
+
+    def revoke(self, key_id: str) -> bool:
+        """
+        Revoga uma API key pelo seu identificador público
+
+        Returns:
+            bool: True se a key existia e foi revogada
+        """
+        with self._lock:
+            conn = self._connect()
+            try:
+                cursor = conn.execute(
+                    "UPDATE api_keys SET revoked_at = ? WHERE key_id = ? AND revoked_at IS NULL",
+                    (time.time(), key_id)
+                )
+                conn.commit()
+            finally:
+                conn.close()
+            self._reload()
+        return cursor.rowcount > 0
+
+
+# Instância singleton do armazenamento de API keys
+api_key_store = ApiKeyStore(settings.API_KEYS_DB_PATH, refresh_interval=settings.API_KEYS_REFRESH_SECONDS)
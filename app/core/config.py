@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,6 +11,13 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_HOURS: int = 3
 
+    # Verified Token Cache (tokens JWT já verificados, até o exp de cada token)
+    TOKEN_CACHE_SIZE: int = 4096
+
+    # API Keys (clientes máquina, armazenadas com hash em SQLite)
+    API_KEYS_DB_PATH: str = "data/api_keys.db"
+    API_KEYS_REFRESH_SECONDS: float = 30.0
+
     # Admin Credentials
     ADMIN_USERNAME: str
     ADMIN_PASSWORD: str
@@ -18,6 +26,36 @@ class Settings(BaseSettings):
     API_TITLE: str = "Audio Transcription Service"
     API_VERSION: str = "1.0.0"
 
+    # Admission Control (orçamento global de requisições de transcrição em processamento)
+    ADMISSION_MAX_INFLIGHT_MB: int = 1024
+    ADMISSION_MAX_INFLIGHT_AUDIO_SECONDS: float = 36000.0
+    ADMISSION_MEMORY_MULTIPLIER: float = 7.0  # memória por byte do corpo (medida com scripts/stress_admission.py)
+    ADMISSION_AUDIO_BYTES_PER_SECOND: int = 16000  # ~128kbps, estimativa de duração pelo tamanho
+    ADMISSION_MAX_QUEUE_DEPTH: int = 50
+    ADMISSION_MAX_QUEUE_PER_TENANT: int = 10
+    ADMISSION_MAX_ANONYMOUS: int = 2  # requisições sem credenciais válidas (fila + em processamento)
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 30.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 10
+
+    # Transcript Store (SQLite + FTS5)
+    TRANSCRIPT_DB_PATH: str = "data/transcripts.db"
+
+    # Audio Fingerprinting (reaproveitar transcrições de gravações WAV equivalentes)
+    FINGERPRINT_ENABLED: bool = True
+    FINGERPRINT_MATCH_THRESHOLD: float = 0.4
+    FINGERPRINT_MAX_SECONDS: float = 300.0  # arquivos mais longos não recebem impressão digital (limita memória)
+
+    # Request Tracing (opt-in: header X-Profile ou amostragem)
+    TRACE_SAMPLE_RATE: float = 0.0
+    TRACE_BUFFER_SIZE: int = 200
+    TRACE_FILE: Optional[str] = None
+    TRACE_CPU_SAMPLE_INTERVAL_MS: float = 5.0
+    TRACE_MAX_CPU_SAMPLERS: int = 1
+    TRACE_ALLOW_PROFILE_HEADER: bool = False  # X-Profile aceito de qualquer cliente (senão só do admin)
+
+    # Startup (pré-carregar numpy/OpenAI antes do worker ficar pronto; padrão: carregamento sob demanda)
+    WARMUP_ON_STARTUP: bool = False
+
     model_config = SettingsConfigDict(
         env_file=".env",
         case_sensitive=True
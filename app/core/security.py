@@ -1,11 +1,57 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, APIKeyHeader
 from app.core.config import settings
+from app.core.api_keys import api_key_store, API_KEY_SUBJECT_PREFIX
+from app.core.tracing import span
 
-security = HTTPBearer()
+security = HTTPBearer(auto_error=False)
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+
+
+class VerifiedTokenCache:
+    """
+    Cache LRU limitado de tokens JWT já verificados
+
+    A chave é o SHA-256 do token (o token em si não fica em memória) e cada entrada
+    expira no `exp` do próprio token, evitando repetir a verificação da assinatura
+    a cada requisição do mesmo cliente.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: bytes) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            payload, expires_at = entry
+            if time.time() >= expires_at:
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return payload
+
+    def put(self, digest: bytes, payload: dict, expires_at: float) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[digest] = (payload, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+token_cache = VerifiedTokenCache(settings.TOKEN_CACHE_SIZE)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -25,24 +71,96 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+def decode_token(token: str) -> Optional[dict]:
     """
-    Verifica e decodifica o token JWT
+    Decodifica e valida um token JWT, consultando antes o cache de tokens verificados
+
+    Returns:
+        dict: Payload do token ou None se inválido/expirado
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Não foi possível validar as credenciais",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    digest = hashlib.sha256(token.encode()).digest()
+
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return payload
 
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
 
-        if payload.get("sub") is None:
-            raise credentials_exception
+    if payload.get("sub") is None:
+        return None
 
-        return payload
+    if isinstance(payload.get("exp"), (int, float)):
+        token_cache.put(digest, payload, float(payload["exp"]))
 
-    except JWTError:
-        raise credentials_exception
+    return payload
+
+
+def authenticate(api_key: Optional[str], bearer_token: Optional[str]) -> Optional[dict]:
+    """
+    Valida as credenciais: API key (tem precedência) ou token JWT
+
+    Returns:
+        dict: Payload com `sub` ou None se as credenciais forem ausentes/inválidas
+    """
+    if api_key:
+        client_id = api_key_store.lookup(api_key)
+        if client_id is None:
+            return None
+        return {"sub": f"{API_KEY_SUBJECT_PREFIX}{client_id}", "client_id": client_id, "auth": "api_key"}
+
+    if bearer_token:
+        return decode_token(bearer_token)
+
+    return None
+
+
+def authenticate_request(request: Request) -> Optional[dict]:
+    """
+    Valida as credenciais a partir dos headers da requisição (para middlewares, que rodam
+    fora da injeção de dependências)
+    """
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    bearer_token = token if scheme.lower() == "bearer" and token else None
+    return authenticate(request.headers.get("x-api-key"), bearer_token)
+
+
+def is_admin(payload: Optional[dict]) -> bool:
+    """
+    Tokens JWT só são emitidos para o admin; API keys pertencem a clientes máquina
+    """
+    return payload is not None and payload.get("auth") != "api_key"
+
+
+def verify_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    api_key: Optional[str] = Depends(api_key_header)
+) -> dict:
+    """
+    Verifica a autenticação da requisição: API key (header X-API-Key) ou token JWT (Bearer)
+    """
+    with span("auth"):
+        payload = authenticate(api_key, credentials.credentials if credentials else None)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Não foi possível validar as credenciais",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return payload
+
+
+def verify_admin_token(token_data: dict = Depends(verify_token)) -> dict:
+    """
+    Exige um token JWT do admin (API keys de clientes não podem gerenciar outras keys)
+    """
+    if not is_admin(token_data):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Operação permitida apenas com token JWT do admin"
+        )
+    return token_data
@@ -0,0 +1,333 @@
+import functools
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Callable, Optional
+from fastapi import Request
+from app.core.config import settings
+from app.core.logger import logger
+
+
+class Trace:
+    """
+    Árvore de spans das etapas do pipeline de uma requisição
+    """
+
+    def __init__(self, name: str, attributes: dict):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attributes = attributes
+        self.started_at = time.time()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.spans: list[dict] = []
+        self.cpu_profile: Optional[dict] = None
+        self.span_bounds: dict[str, tuple[int, int]] = {}
+        # Threads trabalhando para a requisição (ident -> nome), amostradas pelo profile de CPU
+        self.threads: dict[int, str] = {}
+        self._next_id = 1
+
+    def new_span_id(self) -> int:
+        span_id = self._next_id
+        self._next_id += 1
+        return span_id
+
+    def add_span(self, name: str, start_ns: int, end_ns: int, parent_id: int, span_id: Optional[int] = None, attributes: Optional[dict] = None) -> None:
+        self.spans.append({
+            "id": span_id if span_id is not None else self.new_span_id(),
+            "parent_id": parent_id,
+            "name": name,
+            "start_ns": start_ns,
+            "end_ns": end_ns,
+            "attributes": attributes or {},
+        })
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def summary(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "spans": len(self.spans),
+            "cpu_profile": self.cpu_profile is not None,
+            **self.attributes,
+        }
+
+    def to_chrome_trace(self) -> dict:
+        """
+        Exporta no formato Chrome Trace Event (abre em chrome://tracing ou ui.perfetto.dev)
+        """
+        def event(name: str, start_ns: int, end_ns: int, args: dict) -> dict:
+            return {
+                "name": name,
+                "ph": "X",
+                "ts": (start_ns - self.start_ns) / 1e3,
+                "dur": (end_ns - start_ns) / 1e3,
+                "pid": 1,
+                "tid": 1,
+                "args": args,
+            }
+
+        events = [event(self.name, self.start_ns, self.end_ns or self.start_ns, self.attributes)]
+        events.extend(
+            event(span["name"], span["start_ns"], span["end_ns"], {"span_id": span["id"], "parent_id": span["parent_id"], **span["attributes"]})
+            for span in self.spans
+        )
+
+        trace = {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"trace_id": self.trace_id, "started_at": self.started_at},
+        }
+        if self.cpu_profile is not None:
+            trace["otherData"]["cpu_profile"] = self.cpu_profile
+        return trace
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span_id: ContextVar[int] = ContextVar("current_span_id", default=0)
+
+
+class _Span:
+    """
+    Context manager que registra um span filho do span atual
+    """
+
+    __slots__ = ("trace", "name", "attributes", "span_id", "parent_id", "start_ns", "token")
+
+    def __init__(self, trace: Trace, name: str, attributes: dict):
+        self.trace = trace
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.parent_id = _current_span_id.get()
+        self.span_id = self.trace.new_span_id()
+        self.token = _current_span_id.set(self.span_id)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        _current_span_id.reset(self.token)
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.trace.span_bounds[self.name] = (self.start_ns, end_ns)
+        self.trace.add_span(self.name, self.start_ns, end_ns, self.parent_id, self.span_id, self.attributes)
+        return False
+
+
+class _NoopSpan:
+    """
+    Span vazio usado quando a requisição não está sendo perfilada (custo praticamente zero)
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attributes):
+    """
+    Registra uma etapa do pipeline na trace da requisição atual, se houver
+
+    Uso: `with span("base64_decode", size=n): ...`
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return _Span(trace, name, attributes)
+
+
+def record_between(name: str, after: str, before: Optional[str] = None, **attributes) -> None:
+    """
+    Registra um span do fim do span `after` até o início do span `before` (ou até agora)
+
+    Serve para etapas sem ponto de instrumentação próprio, como a leitura e a validação do
+    corpo feitas pelo FastAPI antes do endpoint ser chamado. Sem o span `after`, começa no
+    início da trace.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    start_ns = trace.span_bounds[after][1] if after in trace.span_bounds else trace.start_ns
+    end_ns = trace.span_bounds[before][0] if before in trace.span_bounds else time.perf_counter_ns()
+    trace.add_span(name, start_ns, end_ns, _current_span_id.get(), attributes=attributes)
+
+
+def traced_thread(func: Callable) -> Callable:
+    """
+    Envolve uma função executada no threadpool para que a thread entre no profile de CPU
+
+    O `run_in_threadpool` copia o contexto, então a função enxerga a trace da requisição;
+    enquanto ela roda, a thread fica registrada em `Trace.threads` e é amostrada junto
+    com a do event loop. Uso: `await run_in_threadpool(traced_thread(func), *args)`.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        trace = _current_trace.get()
+        if trace is None:
+            return func(*args, **kwargs)
+        ident = threading.get_ident()
+        trace.threads[ident] = threading.current_thread().name
+        try:
+            return func(*args, **kwargs)
+        finally:
+            # As threads do pool são reaproveitadas por outras requisições
+            trace.threads.pop(ident, None)
+    return wrapper
+
+
+class CpuSampler:
+    """
+    Profiler de amostragem: captura periodicamente a pilha das threads que atendem a requisição
+
+    Amostra as threads registradas em `threads` (a do event loop e as do threadpool
+    registradas por `traced_thread`) e agrega as amostras em pilhas colapsadas
+    ("thread;a;b;c" -> contagem), formato aceito por ferramentas de flame graph. Em
+    handlers async a thread do event loop é compartilhada, então requisições concorrentes
+    podem aparecer nas mesmas amostras.
+    """
+
+    def __init__(self, threads: dict[int, str], interval: float, max_depth: int = 64):
+        self.threads = threads
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="cpu-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            # list() copia o dicionário sem liberar o GIL (ele muda em outras threads)
+            for thread_id, thread_name in list(self.threads.items()):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(thread_name)
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self) -> dict:
+        self._stop.set()
+        self._thread.join()
+        return {
+            "interval_ms": self.interval * 1000,
+            "total_samples": sum(self.samples.values()),
+            "stacks": dict(self.samples.most_common(200)),
+        }
+
+
+class TraceRecorder:
+    """
+    Decide quais requisições são perfiladas e guarda as traces concluídas
+
+    Uma requisição é perfilada quando envia o header `X-Profile` (`1`/`true` para spans,
+    `cpu` para spans + profile de CPU) e o chamador tem permissão para isso, ou quando cai
+    na amostragem `TRACE_SAMPLE_RATE`. No máximo `max_cpu_samplers` profiles de CPU rodam
+    ao mesmo tempo; acima disso a trace segue só com spans. As traces ficam em um ring
+    buffer em memória e, opcionalmente, são anexadas a um arquivo (uma trace Chrome por linha).
+    """
+
+    def __init__(self, sample_rate: float, buffer_size: int, trace_file: Optional[str], cpu_sample_interval: float, max_cpu_samplers: int = 1):
+        self.sample_rate = sample_rate
+        self.trace_file = trace_file
+        self.cpu_sample_interval = cpu_sample_interval
+        self._buffer: deque = deque(maxlen=buffer_size)
+        self._file_lock = threading.Lock()
+        self._cpu_slots = threading.BoundedSemaphore(max_cpu_samplers)
+
+    def start(self, request: Request, honour_header: bool) -> Optional[tuple[Trace, object, Optional[CpuSampler]]]:
+        """
+        Inicia a trace da requisição, se ela deve ser perfilada
+
+        Args:
+            request: Requisição recebida
+            honour_header: Se o header `X-Profile` deve ser atendido (admin ou permitido na configuração)
+        """
+        flag = request.headers.get("x-profile", "").lower() if honour_header else ""
+        requested = flag in ("1", "true", "cpu")
+        if not requested and not (self.sample_rate > 0 and random.random() < self.sample_rate):
+            return None
+
+        trace = Trace(
+            f"{request.method} {request.url.path}",
+            {"method": request.method, "path": request.url.path, "sampled": not requested}
+        )
+        token = _current_trace.set(trace)
+
+        sampler = None
+        if flag == "cpu":
+            if self._cpu_slots.acquire(blocking=False):
+                trace.threads[threading.get_ident()] = threading.current_thread().name
+                sampler = CpuSampler(trace.threads, self.cpu_sample_interval)
+                sampler.start()
+            else:
+                trace.attributes["cpu_profile_skipped"] = True
+
+        return trace, token, sampler
+
+    def finish(self, state: tuple[Trace, object, Optional[CpuSampler]], status_code: Optional[int]) -> None:
+        trace, token, sampler = state
+        trace.end_ns = time.perf_counter_ns()
+        trace.attributes["status_code"] = status_code
+        _current_trace.reset(token)
+
+        if sampler is not None:
+            trace.cpu_profile = sampler.stop()
+            self._cpu_slots.release()
+
+        self._buffer.append(trace)
+
+        if self.trace_file:
+            try:
+                line = json.dumps(trace.to_chrome_trace(), ensure_ascii=False)
+                with self._file_lock:
+                    with open(self.trace_file, "a", encoding="utf-8") as f:
+                        f.write(line + "\n")
+            except Exception as e:
+                logger.error(f"Erro ao gravar trace {trace.trace_id}: {str(e)}")
+
+    def list_traces(self) -> list[dict]:
+        return [trace.summary() for trace in reversed(self._buffer)]
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        for trace in self._buffer:
+            if trace.trace_id == trace_id:
+                return trace
+        return None
+
+
+# Instância singleton do gravador de traces
+trace_recorder = TraceRecorder(
+    sample_rate=settings.TRACE_SAMPLE_RATE,
+    buffer_size=settings.TRACE_BUFFER_SIZE,
+    trace_file=settings.TRACE_FILE,
+    cpu_sample_interval=settings.TRACE_CPU_SAMPLE_INTERVAL_MS / 1000,
+    max_cpu_samplers=settings.TRACE_MAX_CPU_SAMPLERS
+)
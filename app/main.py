@@ -1,12 +1,35 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import settings
 from app.core.logger import logger
-from app.routers import auth, transcription
+from app.core.admission import admission_controller, AdmissionRejected, request_tenant, request_content_length
+from app.core.security import authenticate_request, is_admin
+from app.core.tracing import trace_recorder, span
+from app.routers import auth, transcription, transcripts, admin
+from app.services.transcript_store import transcript_store
+from app.services.transcription_service import transcription_service
 import time
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm-up opcional: roda antes do worker aceitar conexões (e responder ao health check)
+    if settings.WARMUP_ON_STARTUP:
+        start_time = time.time()
+        transcription_service.warm_up()
+        logger.info(f"Warm-up concluído em {time.time() - start_time:.2f}s")
+
+    yield
+
+    # Persistir transcrições pendentes antes de encerrar o worker
+    transcript_store.close()
+
+
 # Criar aplicação FastAPI
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.API_TITLE,
     version=settings.API_VERSION,
     description="""
@@ -16,6 +39,7 @@ app = FastAPI(
     * **Gerar tokens JWT** com validade de 3 horas
     * **Transcrever áudios grandes** usando OpenAI Whisper
     * **Suporte a múltiplos formatos** de áudio (mp3, wav, m4a, etc.)
+    * **Buscar transcrições anteriores** com busca full-text em `/transcripts/search`
 
     ### Como usar:
     1. Obtenha um token JWT no endpoint `/auth/token`
@@ -41,6 +65,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Middleware de controle de admissão (antes de ler o corpo da requisição)
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    # Apenas uploads de transcrição consomem o orçamento de memória/áudio
+    if request.method != "POST" or not request.url.path.startswith("/transcription"):
+        return await call_next(request)
+
+    tenant = request_tenant(request)
+
+    try:
+        with span("admission_wait", tenant=tenant):
+            ticket = await admission_controller.acquire(tenant, request_content_length(request))
+    except AdmissionRejected as e:
+        logger.warning(f"Requisição descartada pelo controle de admissão: {e.reason} - Tenant: {tenant}")
+        return JSONResponse(
+            status_code=503,
+            content={"detail": f"Serviço sobrecarregado: {e.reason}. Tente novamente em {e.retry_after}s."},
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    try:
+        return await call_next(request)
+    finally:
+        admission_controller.release(ticket)
+
+
 # Middleware para logging de requisições
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
@@ -61,9 +111,37 @@ async def log_requests(request: Request, call_next):
     return response
 
 
+# Middleware de profiling por requisição (opt-in; sem custo quando desligado)
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    # Apenas as rotas de transcrição são perfiladas
+    if not request.url.path.startswith("/transcription"):
+        return await call_next(request)
+
+    # O header X-Profile só é atendido para o admin (ou se liberado na configuração)
+    honour_header = "x-profile" in request.headers and (
+        settings.TRACE_ALLOW_PROFILE_HEADER or is_admin(authenticate_request(request))
+    )
+
+    state = trace_recorder.start(request, honour_header)
+    if state is None:
+        return await call_next(request)
+
+    status_code = None
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers["X-Trace-Id"] = state[0].trace_id
+        return response
+    finally:
+        trace_recorder.finish(state, status_code)
+
+
 # Registrar routers
 app.include_router(auth.router)
 app.include_router(transcription.router)
+app.include_router(transcripts.router)
+app.include_router(admin.router)
 
 
 # Log de inicialização
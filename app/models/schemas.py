@@ -30,6 +30,39 @@ class TokenResponse(BaseModel):
     expires_in_hours: int
 
 
+class ApiKeyCreateRequest(BaseModel):
+    """
+    Modelo para requisição de criação de API key
+    """
+    client_id: str = Field(..., min_length=1, max_length=100, description="Identificador do cliente (usado como `sub` nas requisições)")
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "client_id": "batch-ingest"
+                }
+            ]
+        }
+    }
+
+
+class ApiKeyInfo(BaseModel):
+    """
+    Modelo com os dados públicos de uma API key
+    """
+    key_id: str = Field(..., description="Identificador público da key (usado para revogar)")
+    client_id: str
+    created_at: float = Field(..., description="Data de criação (timestamp Unix)")
+
+
+class ApiKeyResponse(ApiKeyInfo):
+    """
+    Modelo para resposta com a API key criada (o valor só é exibido uma vez)
+    """
+    api_key: str = Field(..., description="API key para o header X-API-Key")
+
+
 class TranscriptionResponse(BaseModel):
     """
     Modelo para resposta de transcrição
@@ -38,6 +71,7 @@ class TranscriptionResponse(BaseModel):
     language: Optional[str] = Field(None, description="Idioma detectado")
     duration: Optional[float] = Field(None, description="Duração do processamento em segundos")
     compressed: Optional[bool] = Field(False, description="Indica se o áudio foi comprimido automaticamente")
+    reused: Optional[bool] = Field(False, description="Indica se a transcrição foi reaproveitada de um áudio idêntico ou equivalente já processado")
 
     model_config = {
         "json_schema_extra": {
@@ -46,7 +80,8 @@ class TranscriptionResponse(BaseModel):
                     "text": "Este é o texto transcrito do áudio",
                     "language": "pt",
                     "duration": 2.5,
-                    "compressed": False
+                    "compressed": False,
+                    "reused": False
                 }
             ]
         }
@@ -77,3 +112,29 @@ class ErrorResponse(BaseModel):
     Modelo para resposta de erro
     """
     detail: str
+
+
+class TranscriptSearchResult(BaseModel):
+    """
+    Modelo para um segmento encontrado na busca de transcrições
+    """
+    audio_hash: str = Field(..., description="SHA-256 do áudio original")
+    filename: Optional[str] = Field(None, description="Nome do arquivo enviado")
+    language: Optional[str] = Field(None, description="Idioma detectado")
+    created_at: float = Field(..., description="Data da transcrição (timestamp Unix)")
+    segment_index: int = Field(..., description="Posição do segmento na transcrição")
+    start: Optional[float] = Field(None, description="Início do segmento no áudio (segundos)")
+    end: Optional[float] = Field(None, description="Fim do segmento no áudio (segundos)")
+    snippet: str = Field(..., description="Trecho do segmento com os termos destacados")
+    score: float = Field(..., description="Relevância (BM25, maior é melhor)")
+
+
+class TranscriptSearchResponse(BaseModel):
+    """
+    Modelo para resposta paginada da busca de transcrições
+    """
+    query: str
+    total: int = Field(..., description="Total de segmentos encontrados")
+    page: int
+    page_size: int
+    results: list[TranscriptSearchResult]
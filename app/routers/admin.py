@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from app.core.security import verify_admin_token
+from app.core.tracing import trace_recorder
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"]
+)
+
+
+@router.get(
+    "/traces",
+    status_code=status.HTTP_200_OK,
+    summary="Listar Traces",
+    description="Lista as traces de requisições perfiladas mais recentes (header X-Profile ou amostragem)"
+)
+async def list_traces(token_data: dict = Depends(verify_admin_token)):
+    """
+    Endpoint para listar as traces guardadas no ring buffer
+    """
+    return trace_recorder.list_traces()
+
+
+@router.get(
+    "/traces/{trace_id}",
+    status_code=status.HTTP_200_OK,
+    summary="Exportar Trace",
+    description="Retorna a trace no formato Chrome Trace Event (abra em chrome://tracing ou ui.perfetto.dev)"
+)
+async def get_trace(trace_id: str, token_data: dict = Depends(verify_admin_token)):
+    """
+    Endpoint para exportar uma trace com a árvore de spans da requisição
+    """
+    trace = trace_recorder.get(trace_id)
+    if trace is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trace não encontrada"
+        )
+    return trace.to_chrome_trace()
+
+
+@router.get(
+    "/traces/{trace_id}/cpu",
+    response_class=PlainTextResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Profile de CPU",
+    description="Retorna o profile de CPU da requisição em pilhas colapsadas (compatível com flamegraph.pl e speedscope)"
+)
+async def get_trace_cpu_profile(trace_id: str, token_data: dict = Depends(verify_admin_token)):
+    """
+    Endpoint para exportar o profile de CPU (apenas requisições com `X-Profile: cpu`)
+    """
+    trace = trace_recorder.get(trace_id)
+    if trace is None or trace.cpu_profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile de CPU não encontrado para esta trace"
+        )
+    return "\n".join(f"{stack} {count}" for stack, count in trace.cpu_profile["stacks"].items())
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, status
-from app.models.schemas import TokenRequest, TokenResponse
-from app.core.security import create_access_token
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.models.schemas import TokenRequest, TokenResponse, ApiKeyCreateRequest, ApiKeyResponse, ApiKeyInfo
+from app.core.security import create_access_token, verify_admin_token
+from app.core.api_keys import api_key_store
 from app.core.config import settings
 from app.core.logger import logger
 
@@ -46,3 +47,67 @@ async def generate_token(token_request: TokenRequest) -> TokenResponse:
         token_type="bearer",
         expires_in_hours=settings.ACCESS_TOKEN_EXPIRE_HOURS
     )
+
+
+@router.post(
+    "/api-keys",
+    response_model=ApiKeyResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Criar API Key",
+    description="Cria uma API key de longa duração para um cliente máquina. O valor da key é exibido apenas nesta resposta"
+)
+def create_api_key(
+    request: ApiKeyCreateRequest,
+    token_data: dict = Depends(verify_admin_token)
+) -> ApiKeyResponse:
+    """
+    Endpoint para criar API keys
+
+    - **client_id**: Identificador do cliente
+    - **Authorization**: Bearer token JWT do admin (obrigatório no header)
+
+    Use a key no header `X-API-Key` em vez do token JWT.
+    """
+    try:
+        created = api_key_store.create(request.client_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    logger.info(f"API key {created['key_id']} criada para o cliente: {request.client_id}")
+
+    return ApiKeyResponse(**created)
+
+
+@router.get(
+    "/api-keys",
+    response_model=list[ApiKeyInfo],
+    status_code=status.HTTP_200_OK,
+    summary="Listar API Keys",
+    description="Lista as API keys ativas (sem o valor das keys)"
+)
+def list_api_keys(token_data: dict = Depends(verify_admin_token)) -> list[ApiKeyInfo]:
+    """
+    Endpoint para listar API keys ativas
+    """
+    return [ApiKeyInfo(**key) for key in api_key_store.list_keys()]
+
+
+@router.delete(
+    "/api-keys/{key_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Revogar API Key",
+    description="Revoga uma API key pelo seu identificador público"
+)
+def revoke_api_key(key_id: str, token_data: dict = Depends(verify_admin_token)) -> None:
+    """
+    Endpoint para revogar API keys
+    """
+    if not api_key_store.revoke(key_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="API key não encontrada"
+        )
+
+    logger.info(f"API key {key_id} revogada")
@@ -2,6 +2,8 @@ from fastapi import APIRouter, Depends, File, UploadFile, status
 from app.models.schemas import TranscriptionResponse, ErrorResponse, AudioBase64Request
 from app.services.transcription_service import transcription_service
 from app.core.security import verify_token
+from app.core.admission import admission_controller
+from app.core.tracing import record_between
 
 router = APIRouter(
     prefix="/transcription",
@@ -20,6 +22,7 @@ router = APIRouter(
         400: {"model": ErrorResponse, "description": "Formato de arquivo inválido"},
         401: {"model": ErrorResponse, "description": "Token inválido ou expirado"},
         413: {"model": ErrorResponse, "description": "Arquivo muito grande mesmo após compressão"},
+        503: {"model": ErrorResponse, "description": "Serviço sobrecarregado (controle de admissão). Respeite o header Retry-After"},
         500: {"model": ErrorResponse, "description": "Erro ao processar transcrição"}
     }
 )
@@ -31,21 +34,27 @@ async def transcribe_audio(
     Endpoint para transcrever arquivos de áudio
 
     - **file**: Arquivo de áudio para transcrição
-    - **Authorization**: Bearer token JWT (obrigatório no header)
+    - **Authorization**: Bearer token JWT ou header `X-API-Key` (obrigatório)
 
     Formatos aceitos: mp3, mp4, mpeg, mpga, m4a, wav, webm, ogg, flac
     Limite de tamanho: 25MB (50MB para WAV com compressão automática)
 
     **Compressão automática (apenas WAV):** Arquivos WAV maiores que 25MB são automaticamente convertidos para mono e reduzidos para 16kHz.
     """
+    # Leitura do corpo (entre a admissão e a autenticação) e validação (após a autenticação)
+    # são feitas pelo FastAPI antes do endpoint
+    record_between("body_read", "admission_wait", "auth")
+    record_between("body_validation", "auth")
+
     # Transcrever o áudio
-    result = await transcription_service.transcribe_audio(file)
+    result = await transcription_service.transcribe_audio(file, tenant=token_data.get("sub"))
 
     return TranscriptionResponse(
         text=result["text"],
         language=result["language"],
         duration=result["duration"],
-        compressed=result.get("compressed", False)
+        compressed=result.get("compressed", False),
+        reused=result.get("reused", False)
     )
 
 
@@ -60,6 +69,7 @@ async def transcribe_audio(
         400: {"model": ErrorResponse, "description": "Formato de arquivo inválido ou base64 inválido"},
         401: {"model": ErrorResponse, "description": "Token inválido ou expirado"},
         413: {"model": ErrorResponse, "description": "Arquivo muito grande mesmo após compressão"},
+        503: {"model": ErrorResponse, "description": "Serviço sobrecarregado (controle de admissão). Respeite o header Retry-After"},
         500: {"model": ErrorResponse, "description": "Erro ao processar transcrição"}
     }
 )
@@ -72,24 +82,31 @@ async def transcribe_audio_base64(
 
     - **audio_base64**: String base64 do áudio
     - **filename**: Nome do arquivo com extensão (ex: audio.mp3)
-    - **Authorization**: Bearer token JWT (obrigatório no header)
+    - **Authorization**: Bearer token JWT ou header `X-API-Key` (obrigatório)
 
     Formatos aceitos: mp3, mp4, mpeg, mpga, m4a, wav, webm, ogg, flac
     Limite de tamanho: 25MB (50MB para WAV com compressão automática)
 
     **Compressão automática (apenas WAV):** Arquivos WAV maiores que 25MB são automaticamente convertidos para mono e reduzidos para 16kHz.
     """
+    # Leitura do corpo (entre a admissão e a autenticação) e validação (após a autenticação)
+    # são feitas pelo FastAPI antes do endpoint
+    record_between("body_read", "admission_wait", "auth")
+    record_between("body_validation", "auth")
+
     # Transcrever o áudio
     result = await transcription_service.transcribe_audio_base64(
         request.audio_base64,
-        request.filename
+        request.filename,
+        tenant=token_data.get("sub")
     )
 
     return TranscriptionResponse(
         text=result["text"],
         language=result["language"],
         duration=result["duration"],
-        compressed=result.get("compressed", False)
+        compressed=result.get("compressed", False),
+        reused=result.get("reused", False)
     )
 
 
@@ -107,3 +124,16 @@ async def health_check():
         "status": "healthy",
         "service": "transcription"
     }
+
+
+@router.get(
+    "/admission",
+    status_code=status.HTTP_200_OK,
+    summary="Métricas de Admissão",
+    description="Retorna profundidade da fila, orçamento em uso e contadores de requisições descartadas"
+)
+async def admission_stats(token_data: dict = Depends(verify_token)):
+    """
+    Endpoint para consultar o estado do controle de admissão
+    """
+    return admission_controller.stats()
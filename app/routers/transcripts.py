@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, Query, status
+from app.models.schemas import TranscriptSearchResponse, ErrorResponse
+from app.services.transcript_store import transcript_store
+from app.core.security import verify_token
+
+router = APIRouter(
+    prefix="/transcripts",
+    tags=["Transcrições Armazenadas"]
+)
+
+
+@router.get(
+    "/search",
+    response_model=TranscriptSearchResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Buscar Transcrições",
+    description="Busca full-text nos segmentos das transcrições já realizadas pelo usuário, ordenada por relevância",
+    responses={
+        200: {"description": "Resultados da busca"},
+        401: {"model": ErrorResponse, "description": "Token inválido ou expirado"}
+    }
+)
+def search_transcripts(
+    q: str = Query(..., min_length=1, description="Termos de busca"),
+    page: int = Query(1, ge=1, description="Página (começando em 1)"),
+    page_size: int = Query(20, ge=1, le=100, description="Resultados por página"),
+    token_data: dict = Depends(verify_token)
+) -> TranscriptSearchResponse:
+    """
+    Endpoint para buscar trechos nas transcrições armazenadas
+
+    - **q**: Termos de busca (todos os termos devem aparecer no segmento)
+    - **page** / **page_size**: Paginação dos resultados
+    - **Authorization**: Bearer token JWT ou header `X-API-Key` (obrigatório)
+
+    Retorna apenas transcrições do próprio usuário (claim `sub` do token).
+    """
+    result = transcript_store.search(token_data["sub"], q, page=page, page_size=page_size)
+
+    return TranscriptSearchResponse(
+        query=q,
+        total=result["total"],
+        page=page,
+        page_size=page_size,
+        results=result["results"]
+    )
@@ -0,0 +1,382 @@
+import io
+import wave
+from typing import Optional
+import numpy as np
+
+
+# Parâmetros do espectrograma (áudio normalizado para 8kHz mono)
+SAMPLE_RATE = 8000
+FRAME_SIZE = 1024
+HOP_SIZE = 256  # ~31 frames por segundo
+FRAMES_PER_SECOND = SAMPLE_RATE / HOP_SIZE
+_FFT_CHUNK_FRAMES = 512
+
+# Detecção de picos espectrais e pareamento (landmarks)
+PEAK_NEIGHBORHOOD_TIME = 31
+PEAK_NEIGHBORHOOD_FREQ = 21
+MAX_PEAKS_PER_FRAME = 3
+FAN_OUT = 5
+MAX_DELTA_FRAMES = 63
+FREQ_QUANTIZATION = 1
+DELTA_QUANTIZATION = 2
+PEAK_THRESHOLD_STD = 3.0
+
+# Assinatura MinHash e bandas LSH para busca de quase-duplicatas
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 32
+_ROWS_PER_BAND = NUM_PERMUTATIONS // LSH_BANDS
+_PRIME = (1 << 31) - 1  # hashes de landmark têm 26 bits, então (a * x + b) cabe em uint64
+_rng = np.random.RandomState(20240501)
+_PERM_A = _rng.randint(1, _PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+_PERM_B = _rng.randint(0, _PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+_EMPTY_SLOT = np.uint64(_PRIME)  # valor de assinatura de um conjunto vazio (nunca produzido por um hash)
+
+# Verificação por janelas: a similaridade global aceitaria gravações que compartilham só
+# uma parte (ex.: a mesma vinheta de abertura), então cada janela da gravação armazenada
+# coberta pelo áudio recebido precisa corresponder ao trecho equivalente dele
+WINDOW_SECONDS = 20.0
+WINDOW_MIN_SIMILARITY = 0.25  # por janela inteira; proporcional à fração coberta nas bordas
+WINDOW_MIN_FRACTION = 0.5  # bordas cobrindo menos que isso da janela não são verificadas
+
+
+def _minhash(hashes: np.ndarray) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Assinatura MinHash de um conjunto de hashes de landmark
+
+    Returns:
+        tuple: (menor hash por permutação, índice do hash escolhido em cada permutação);
+        um conjunto vazio resulta em uma assinatura só com `_EMPTY_SLOT` e índices None
+    """
+    if len(hashes) == 0:
+        return np.full(NUM_PERMUTATIONS, _EMPTY_SLOT, dtype=np.uint64), None
+    permuted = (hashes[:, None] * _PERM_A[None, :] + _PERM_B[None, :]) % np.uint64(_PRIME)
+    argmin = permuted.argmin(axis=0)
+    return permuted[argmin, np.arange(NUM_PERMUTATIONS)], argmin
+
+
+def _segment_signature(hashes: np.ndarray, times: np.ndarray, start: float, end: float) -> np.ndarray:
+    """
+    Assinatura MinHash dos landmarks com âncora em [start, end)
+    """
+    return _minhash(np.unique(hashes[(times >= start) & (times < end)]))[0]
+
+
+class Fingerprint:
+    """
+    Impressão digital perceptual de um áudio
+
+    Guarda, para cada permutação MinHash, o menor hash de landmark (par de picos
+    espectrais) e o instante em que ele ocorre, permitindo estimar o deslocamento
+    temporal entre duas gravações equivalentes, além de uma assinatura por janela de
+    `WINDOW_SECONDS` para verificar o conteúdo ao longo de todo o áudio.
+
+    Os landmarks brutos só existem na impressão do áudio recebido (não são persistidos)
+    e permitem calcular a assinatura de qualquer trecho dele.
+    """
+
+    def __init__(
+        self,
+        signature: np.ndarray,
+        times: np.ndarray,
+        duration: float,
+        windows: np.ndarray,
+        landmarks: Optional[tuple[np.ndarray, np.ndarray]] = None
+    ):
+        self.signature = signature
+        self.times = times
+        self.duration = duration
+        self.windows = windows
+        self.landmarks = landmarks
+
+    def band_keys(self) -> list[int]:
+        """
+        Chaves das bandas LSH (uma por banda) usadas no índice
+        """
+        bands = self.signature.reshape(LSH_BANDS, _ROWS_PER_BAND)
+        keys = []
+        for band in bands:
+            key = 0
+            for value in band:
+                key = (key * 1000003 + int(value)) & 0x7FFFFFFFFFFFFFFF
+            keys.append(key)
+        return keys
+
+    def similarity(self, other: "Fingerprint") -> float:
+        """
+        Estimativa de similaridade de Jaccard entre os conjuntos de landmarks
+        """
+        return float(np.mean(self.signature == other.signature))
+
+    def offset_to(self, other: "Fingerprint") -> float:
+        """
+        Deslocamento em segundos a somar a um instante deste áudio para obter o instante equivalente em `other`
+        """
+        matches = self.signature == other.signature
+        if not matches.any():
+            return 0.0
+        return float(np.median(other.times[matches] - self.times[matches]))
+
+    def segment_signature(self, start: float, end: float) -> np.ndarray:
+        """
+        Assinatura MinHash dos landmarks com âncora em [start, end) deste áudio
+        """
+        return _segment_signature(*self.landmarks, start, end)
+
+    def matches_windows(self, other: "Fingerprint", offset: float) -> bool:
+        """
+        Verifica janela a janela se o trecho de `other` coberto por este áudio tem o mesmo conteúdo
+
+        Para cada janela de `other` coberta (ao menos `WINDOW_MIN_FRACTION`) pelo intervalo
+        [offset, offset + duração], compara a assinatura da janela com a do trecho
+        equivalente deste áudio; uma cobertura parcial f reduz o Jaccard esperado na mesma
+        proporção, então o mínimo exigido é `WINDOW_MIN_SIMILARITY * f`.
+
+        Args:
+            other: Impressão armazenada (com assinaturas por janela)
+            offset: Deslocamento retornado por `offset_to(other)`
+
+        Returns:
+            bool: True se todas as janelas verificadas correspondem (e ao menos uma foi verificada)
+        """
+        start, end = offset, offset + self.duration
+        verified = 0
+        for index, window in enumerate(other.windows):
+            window_start = index * WINDOW_SECONDS
+            window_end = min(window_start + WINDOW_SECONDS, other.duration)
+            overlap_start, overlap_end = max(window_start, start), min(window_end, end)
+            if window_end <= window_start or window[0] == _EMPTY_SLOT:
+                continue  # janela sem landmarks (silêncio)
+            fraction = (overlap_end - overlap_start) / (window_end - window_start)
+            if fraction < WINDOW_MIN_FRACTION:
+                continue
+
+            segment = self.segment_signature(overlap_start - offset, overlap_end - offset)
+            if np.mean(segment == window) < WINDOW_MIN_SIMILARITY * fraction:
+                return False
+            verified += 1
+        return verified > 0
+
+    def to_bytes(self) -> tuple[bytes, bytes, bytes]:
+        return (
+            self.signature.astype(np.uint64).tobytes(),
+            self.times.astype(np.float32).tobytes(),
+            self.windows.astype(np.uint64).tobytes()
+        )
+
+    @classmethod
+    def from_bytes(cls, signature: bytes, times: bytes, duration: float, windows: bytes) -> "Fingerprint":
+        return cls(
+            np.frombuffer(signature, dtype=np.uint64),
+            np.frombuffer(times, dtype=np.float32),
+            duration,
+            np.frombuffer(windows, dtype=np.uint64).reshape(-1, NUM_PERMUTATIONS)
+        )
+
+
+_SAMPLE_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+_DECODE_CHUNK_SECONDS = 10
+_RESAMPLE_CHUNK = 1 << 18
+
+
+def _resample_linear(signal: np.ndarray, rate: float) -> np.ndarray:
+    """
+    Reamostragem linear para 8kHz em float32, calculada em blocos da saída
+    """
+    n_out = int(len(signal) * SAMPLE_RATE / rate)
+    out = np.empty(n_out, dtype=np.float32)
+    step = rate / SAMPLE_RATE
+    for start in range(0, n_out, _RESAMPLE_CHUNK):
+        positions = np.arange(start, min(start + _RESAMPLE_CHUNK, n_out)) * step
+        left = positions.astype(np.int64)
+        right = np.minimum(left + 1, len(signal) - 1)
+        frac = (positions - left).astype(np.float32)
+        out[start:start + len(positions)] = signal[left] * (1 - frac) + signal[right] * frac
+    return out
+
+
+def _decode_wav(audio_bytes: bytes, max_seconds: float) -> Optional[tuple[np.ndarray, float]]:
+    """
+    Decodifica um WAV PCM em um sinal mono float32 reamostrado para 8kHz
+
+    O áudio é lido em blocos de poucos segundos e reduzido por média em blocos com passo
+    inteiro (framerate // 8kHz), que também atenua aliasing; só a taxa intermediária
+    restante (ex.: 8820Hz para 44.1kHz) passa por interpolação linear. Arquivos mais
+    longos que `max_seconds` não são decodificados (limita memória e CPU): uma impressão
+    só do início não permitiria verificar o restante do áudio.
+
+    Returns:
+        tuple: (sinal normalizado, duração do arquivo em segundos) ou None
+    """
+    try:
+        with wave.open(io.BytesIO(audio_bytes), 'rb') as wav_in:
+            channels = wav_in.getnchannels()
+            sampwidth = wav_in.getsampwidth()
+            framerate = wav_in.getframerate()
+            nframes = wav_in.getnframes()
+            dtype = _SAMPLE_DTYPES.get(sampwidth)
+            if dtype is None or framerate <= 0 or nframes > max_seconds * framerate:
+                return None
+
+            stride = max(framerate // SAMPLE_RATE, 1)
+            chunk_frames = stride * SAMPLE_RATE * _DECODE_CHUNK_SECONDS
+            remaining = nframes
+
+            signal = np.empty(remaining // stride, dtype=np.float32)
+            filled = 0
+            while remaining >= stride:
+                frames = wav_in.readframes(min(chunk_frames, remaining))
+                n_frames = len(frames) // (sampwidth * channels)
+                if n_frames < stride:
+                    break
+                remaining -= n_frames
+
+                # Usar apenas o primeiro canal (suficiente para a impressão digital)
+                samples = np.frombuffer(frames, dtype=dtype, count=n_frames * channels)[::channels].astype(np.float32)
+                usable = n_frames // stride
+                signal[filled:filled + usable] = samples[:usable * stride].reshape(-1, stride).mean(axis=1)
+                filled += usable
+    except Exception:
+        return None
+
+    signal = signal[:filled]
+    if sampwidth == 1:  # 8-bit (sem sinal)
+        signal -= 128.0
+
+    rate = framerate / stride
+    if rate != SAMPLE_RATE:
+        signal = _resample_linear(signal, rate)
+    if len(signal) < FRAME_SIZE:
+        return None
+
+    peak = np.abs(signal).max()
+    if peak == 0:
+        return None
+    signal /= peak
+    return signal, nframes / framerate
+
+
+def _sliding_max(values: np.ndarray, size: int, axis: int) -> np.ndarray:
+    """
+    Máximo em janela deslizante centrada ao longo de um eixo (filtro de máximo separável)
+    """
+    pad = [(0, 0)] * values.ndim
+    pad[axis] = (size // 2, size // 2)
+    padded = np.pad(values, pad, mode="constant", constant_values=-np.inf)
+    return np.lib.stride_tricks.sliding_window_view(padded, size, axis=axis).max(axis=-1)
+
+
+def _spectral_peaks(signal: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Encontra picos locais do espectrograma (log-magnitude)
+
+    Returns:
+        tuple: (índices de frame, índices de frequência) dos picos, ordenados por tempo
+    """
+    frames = np.lib.stride_tricks.sliding_window_view(signal, FRAME_SIZE)[::HOP_SIZE]
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+
+    # FFT em blocos para não materializar o espectro complexo de áudios longos de uma vez
+    spectrum = np.empty((len(frames), FRAME_SIZE // 2 + 1), dtype=np.float32)
+    total = 0.0
+    total_sq = 0.0
+    for start in range(0, len(frames), _FFT_CHUNK_FRAMES):
+        chunk = np.log1p(np.abs(np.fft.rfft(frames[start:start + _FFT_CHUNK_FRAMES] * window, axis=1)))
+        spectrum[start:start + len(chunk)] = chunk
+        total += float(chunk.sum(dtype=np.float64))
+        total_sq += float(np.square(chunk, dtype=np.float64).sum())
+
+    mean = total / spectrum.size
+    threshold = mean + PEAK_THRESHOLD_STD * np.sqrt(max(total_sq / spectrum.size - mean * mean, 0.0))
+
+    # Pico = máximo local na vizinhança tempo x frequência e acima da média global; também em
+    # blocos de frames, com margem de meia vizinhança para o máximo nas bordas do bloco
+    halo = PEAK_NEIGHBORHOOD_TIME // 2
+    frame_parts = []
+    freq_parts = []
+    for start in range(0, len(spectrum), _FFT_CHUNK_FRAMES):
+        lo = max(start - halo, 0)
+        block = spectrum[lo:start + _FFT_CHUNK_FRAMES + halo]
+        core = spectrum[start:start + _FFT_CHUNK_FRAMES]
+        local_max = _sliding_max(_sliding_max(block, PEAK_NEIGHBORHOOD_TIME, 0), PEAK_NEIGHBORHOOD_FREQ, 1)
+        local_max = local_max[start - lo:start - lo + len(core)]
+        block_frames, block_freqs = np.nonzero((core == local_max) & (core > threshold))
+        frame_parts.append(block_frames + start)
+        freq_parts.append(block_freqs)
+
+    # Limitar o número de picos por frame, mantendo os mais fortes (em ordem crescente de
+    # intensidade dentro do frame); só os picos são ordenados, não o espectrograma inteiro
+    frame_idx = np.concatenate(frame_parts)
+    freq_idx = np.concatenate(freq_parts)
+    order = np.lexsort((spectrum[frame_idx, freq_idx], frame_idx))
+    frame_idx, freq_idx = frame_idx[order], freq_idx[order]
+    rank_from_end = np.searchsorted(frame_idx, frame_idx, side="right") - np.arange(len(frame_idx))
+
+    keep = rank_from_end <= MAX_PEAKS_PER_FRAME
+    return frame_idx[keep], freq_idx[keep]
+
+
+def _landmarks(frame_idx: np.ndarray, freq_idx: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Combina cada pico âncora com os próximos picos em hashes (f1, f2, dt)
+
+    Returns:
+        tuple: (hashes uint64, instante da âncora em segundos)
+    """
+    hashes = []
+    times = []
+    for k in range(1, FAN_OUT + 1):
+        if len(frame_idx) <= k:
+            break
+        dt = frame_idx[k:] - frame_idx[:-k]
+        valid = (dt > 0) & (dt <= MAX_DELTA_FRAMES)
+        # Quantização grosseira tolera pequenos desvios de frame/frequência (recortes e reamostragem)
+        f1 = (freq_idx[:-k][valid] // FREQ_QUANTIZATION).astype(np.uint64)
+        f2 = (freq_idx[k:][valid] // FREQ_QUANTIZATION).astype(np.uint64)
+        dtq = (dt[valid] // DELTA_QUANTIZATION).astype(np.uint64)
+        hashes.append((f1 << np.uint64(16)) | (f2 << np.uint64(6)) | dtq)
+        times.append(frame_idx[:-k][valid] / FRAMES_PER_SECOND)
+
+    if not hashes:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.float32)
+    return np.concatenate(hashes), np.concatenate(times).astype(np.float32)
+
+
+def compute_fingerprint(audio_bytes: bytes, max_seconds: float = 300.0) -> Optional[Fingerprint]:
+    """
+    Calcula a impressão digital perceptual de um áudio WAV
+
+    Args:
+        audio_bytes: Bytes do arquivo WAV
+        max_seconds: Duração máxima do áudio; arquivos mais longos não recebem impressão digital
+
+    Returns:
+        Fingerprint ou None se o áudio não puder ser decodificado (formatos não-WAV) ou
+        for mais longo que `max_seconds`
+    """
+    decoded = _decode_wav(audio_bytes, max_seconds)
+    if decoded is None:
+        return None
+    signal, duration = decoded
+
+    frame_idx, freq_idx = _spectral_peaks(signal)
+    hashes, times = _landmarks(frame_idx, freq_idx)
+    if len(hashes) == 0:
+        return None
+
+    # MinHash: para cada permutação, o menor hash e o instante da âncora correspondente
+    unique, first = np.unique(hashes, return_index=True)
+    signature, argmin = _minhash(unique)
+
+    # Assinatura de cada janela de WINDOW_SECONDS, usada na verificação do conteúdo
+    n_windows = int(np.ceil(duration / WINDOW_SECONDS))
+    windows = np.empty((n_windows, NUM_PERMUTATIONS), dtype=np.uint64)
+    for index in range(n_windows):
+        windows[index] = _segment_signature(hashes, times, index * WINDOW_SECONDS, (index + 1) * WINDOW_SECONDS)
+
+    return Fingerprint(
+        signature=signature,
+        times=times[first][argmin],
+        duration=duration,
+        windows=windows,
+        landmarks=(hashes, times)
+    )
@@ -0,0 +1,456 @@
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
+from app.core.config import settings
+from app.core.logger import logger
+
+if TYPE_CHECKING:
+    from app.services.fingerprint import Fingerprint
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY,
+    audio_hash TEXT NOT NULL,
+    tenant TEXT NOT NULL,
+    filename TEXT,
+    language TEXT,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (audio_hash, tenant)
+);
+
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    transcript_id INTEGER NOT NULL REFERENCES transcripts(id) ON DELETE CASCADE,
+    seg_index INTEGER NOT NULL,
+    start_time REAL,
+    end_time REAL,
+    text TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_segments_transcript ON segments(transcript_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    text,
+    content='segments',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS segments_ai AFTER INSERT ON segments BEGIN
+    INSERT INTO segments_fts(rowid, text) VALUES (new.id, new.text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS segments_ad AFTER DELETE ON segments BEGIN
+    INSERT INTO segments_fts(segments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+
+CREATE TABLE IF NOT EXISTS fingerprints (
+    transcript_id INTEGER PRIMARY KEY REFERENCES transcripts(id) ON DELETE CASCADE,
+    signature BLOB NOT NULL,
+    times BLOB NOT NULL,
+    duration REAL NOT NULL,
+    windows BLOB
+);
+
+CREATE TABLE IF NOT EXISTS fingerprint_bands (
+    band INTEGER NOT NULL,
+    band_key INTEGER NOT NULL,
+    transcript_id INTEGER NOT NULL REFERENCES transcripts(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_fingerprint_bands ON fingerprint_bands(band, band_key);
+CREATE INDEX IF NOT EXISTS idx_fingerprint_bands_transcript ON fingerprint_bands(transcript_id);
+"""
+
+
+class TranscriptStore:
+    """
+    Armazenamento local de transcrições em SQLite com índice de busca full-text (FTS5)
+
+    As transcrições são indexadas por hash do áudio e tenant. As gravações são
+    enfileiradas e persistidas em lote por uma thread de escrita em segundo plano,
+    sem bloquear a resposta da transcrição.
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 200, flush_interval: float = 0.5):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._local = threading.local()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _init_db(self) -> None:
+        if self._initialized:
+            return
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(_SCHEMA)
+            # Bancos criados antes da verificação por janelas: as impressões antigas ficam sem
+            # janelas e não são mais reaproveitadas (cobriam só o início do áudio)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(fingerprints)")}
+            if "windows" not in columns:
+                conn.execute("ALTER TABLE fingerprints ADD COLUMN windows BLOB")
+            conn.commit()
+        finally:
+            conn.close()
+        self._initialized = True
+
+    def initialize(self) -> None:
+        """
+        Cria o banco e o esquema antecipadamente (usado no warm-up do worker)
+        """
+        self._init_db()
+
+    def _reader(self) -> sqlite3.Connection:
+        """
+        Conexão de leitura por thread (o SQLite não compartilha conexões entre threads)
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self._init_db()
+            conn = self._connect()
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is not None and self._writer.is_alive():
+                return
+            self._init_db()
+            self._writer = threading.Thread(target=self._write_loop, name="transcript-writer", daemon=True)
+            self._writer.start()
+
+    def save(
+        self,
+        audio_hash: str,
+        tenant: str,
+        filename: str,
+        text: str,
+        language: Optional[str],
+        segments: list[dict],
+        fingerprint: Optional["Fingerprint"] = None
+    ) -> None:
+        """
+        Enfileira uma transcrição para persistência em segundo plano
+
+        Args:
+            audio_hash: SHA-256 dos bytes do áudio original
+            tenant: Identificador do tenant (claim `sub` do JWT)
+            filename: Nome do arquivo enviado
+            text: Texto completo transcrito
+            language: Idioma detectado
+            segments: Lista de segmentos com `start`, `end` e `text`
+            fingerprint: Impressão digital perceptual do áudio (apenas WAV)
+        """
+        self._ensure_writer()
+        self._queue.put((audio_hash, tenant, filename, text, language, segments, fingerprint, time.time()))
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            # Agrupar o que já estiver na fila em uma única transação
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                self._write_batch(conn, batch)
+            except Exception as e:
+                logger.error(f"Erro ao persistir {len(batch)} transcrições: {str(e)}")
+
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                break
+
+        self._queue.task_done()
+        conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: list) -> None:
+        """
+        Persiste o lote em uma única transação; se ela falhar, grava item a item para que
+        uma transcrição inválida não descarte as demais do lote
+        """
+        try:
+            with conn:
+                for item in batch:
+                    self._write_item(conn, item)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                raise
+            logger.warning(f"Falha ao persistir lote de {len(batch)} transcrições, gravando uma a uma: {str(e)}")
+
+        for item in batch:
+            try:
+                with conn:
+                    self._write_item(conn, item)
+            except Exception as e:
+                logger.error(f"Erro ao persistir transcrição {item[0]} (tenant {item[1]}): {str(e)}")
+
+    def _write_item(self, conn: sqlite3.Connection, item: tuple) -> None:
+        audio_hash, tenant, filename, text, language, segments, fingerprint, created_at = item
+
+        # Reenvio do mesmo áudio substitui a transcrição anterior (e seus segmentos)
+        conn.execute(
+            "DELETE FROM transcripts WHERE audio_hash = ? AND tenant = ?",
+            (audio_hash, tenant)
+        )
+        cursor = conn.execute(
+            "INSERT INTO transcripts (audio_hash, tenant, filename, language, text, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (audio_hash, tenant, filename, language, text, created_at)
+        )
+        transcript_id = cursor.lastrowid
+
+        # Sem segmentos (resposta sem verbose_json): indexar o texto inteiro como um segmento
+        if not segments:
+            segments = [{"start": None, "end": None, "text": text}]
+
+        conn.executemany(
+            "INSERT INTO segments (transcript_id, seg_index, start_time, end_time, text) VALUES (?, ?, ?, ?, ?)",
+            [
+                (transcript_id, index, segment.get("start"), segment.get("end"), segment.get("text", "").strip())
+                for index, segment in enumerate(segments)
+            ]
+        )
+
+        if fingerprint is not None:
+            signature, times, windows = fingerprint.to_bytes()
+            conn.execute(
+                "INSERT INTO fingerprints (transcript_id, signature, times, duration, windows) VALUES (?, ?, ?, ?, ?)",
+                (transcript_id, signature, times, fingerprint.duration, windows)
+            )
+            conn.executemany(
+                "INSERT INTO fingerprint_bands (band, band_key, transcript_id) VALUES (?, ?, ?)",
+                [(band, key, transcript_id) for band, key in enumerate(fingerprint.band_keys())]
+            )
+
+    def flush(self) -> None:
+        """
+        Aguarda a persistência de todas as transcrições enfileiradas (sem encerrar a thread
+        de escrita; usado pelos scripts de benchmark antes de medir as consultas)
+        """
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.join()
+
+    def close(self) -> None:
+        """
+        Persiste o que estiver pendente e encerra a thread de escrita
+        """
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        self._writer = None
+
+    def _load_transcript(self, conn: sqlite3.Connection, transcript_id: int) -> dict:
+        row = conn.execute(
+            "SELECT audio_hash, text, language FROM transcripts WHERE id = ?",
+            (transcript_id,)
+        ).fetchone()
+        segments = conn.execute(
+            "SELECT start_time, end_time, text FROM segments WHERE transcript_id = ? ORDER BY seg_index",
+            (transcript_id,)
+        ).fetchall()
+        return {
+            "audio_hash": row["audio_hash"],
+            "text": row["text"],
+            "language": row["language"],
+            "segments": [
+                {"start": segment["start_time"], "end": segment["end_time"], "text": segment["text"]}
+                for segment in segments
+            ]
+        }
+
+    def get(self, audio_hash: str, tenant: str) -> Optional[dict]:
+        """
+        Retorna a transcrição armazenada para o hash exato do áudio, se existir
+        """
+        conn = self._reader()
+        row = conn.execute(
+            "SELECT id FROM transcripts WHERE audio_hash = ? AND tenant = ?",
+            (audio_hash, tenant)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._load_transcript(conn, row["id"])
+
+    def find_similar(
+        self,
+        tenant: str,
+        fingerprint: "Fingerprint",
+        threshold: float,
+        max_candidates: int = 20,
+        coverage_tolerance: float = 1.0
+    ) -> Optional[dict]:
+        """
+        Procura uma gravação equivalente (re-encodada ou recortada) do tenant pelo índice LSH
+
+        Só aceita candidatos cuja gravação armazenada cobre todo o áudio recebido após o
+        deslocamento; um trecho mais longo que o original (ou que começa antes dele) teria
+        partes sem transcrição e precisa passar pelo Whisper. Além da similaridade global,
+        cada janela coberta precisa corresponder (`Fingerprint.matches_windows`), para que
+        gravações que só compartilham um trecho não sejam tratadas como a mesma.
+
+        Args:
+            tenant: Identificador do tenant
+            fingerprint: Impressão digital do áudio recebido
+            threshold: Similaridade mínima para considerar duplicata
+            max_candidates: Candidatos verificados (os que colidem em mais bandas)
+            coverage_tolerance: Folga em segundos aceita nas bordas da cobertura
+
+        Returns:
+            dict: Transcrição armazenada com `similarity` e `offset` (segundos a somar a um
+            instante do áudio recebido para obter o instante no áudio armazenado), ou None
+        """
+        from app.services.fingerprint import Fingerprint, LSH_BANDS
+
+        conn = self._reader()
+
+        keys = fingerprint.band_keys()
+        conditions = " OR ".join(["(b.band = ? AND b.band_key = ?)"] * LSH_BANDS)
+        params = [value for band, key in enumerate(keys) for value in (band, key)]
+
+        candidates = conn.execute(
+            "SELECT b.transcript_id, COUNT(*) AS hits FROM fingerprint_bands b "
+            "JOIN transcripts t ON t.id = b.transcript_id "
+            f"WHERE ({conditions}) AND t.tenant = ? "
+            "GROUP BY b.transcript_id ORDER BY hits DESC LIMIT ?",
+            (*params, tenant, max_candidates)
+        ).fetchall()
+
+        best = None
+        for candidate in candidates:
+            row = conn.execute(
+                "SELECT signature, times, duration, windows FROM fingerprints WHERE transcript_id = ?",
+                (candidate["transcript_id"],)
+            ).fetchone()
+            if row["windows"] is None:
+                continue
+            stored = Fingerprint.from_bytes(row["signature"], row["times"], row["duration"], row["windows"])
+            similarity = fingerprint.similarity(stored)
+            if similarity < threshold or (best is not None and similarity <= best[0]):
+                continue
+
+            # O trecho recebido [0, duração] corresponde a [offset, offset + duração] no armazenado
+            offset = fingerprint.offset_to(stored)
+            if offset < -coverage_tolerance or offset + fingerprint.duration > stored.duration + coverage_tolerance:
+                continue
+            if not fingerprint.matches_windows(stored, offset):
+                continue
+
+            best = (similarity, candidate["transcript_id"], offset)
+
+        if best is None:
+            return None
+
+        similarity, transcript_id, offset = best
+        result = self._load_transcript(conn, transcript_id)
+        result["similarity"] = similarity
+        result["offset"] = offset
+        return result
+
+    @staticmethod
+    def _match_expression(query: str) -> str:
+        """
+        Converte o texto digitado em uma expressão FTS5 segura (termos entre aspas, todos obrigatórios)
+        """
+        terms = [term.replace('"', '""') for term in query.split()]
+        return " ".join(f'"{term}"' for term in terms if term)
+
+    def search(self, tenant: str, query: str, page: int = 1, page_size: int = 20) -> dict:
+        """
+        Busca segmentos transcritos do tenant, ordenados por relevância (BM25)
+
+        Args:
+            tenant: Identificador do tenant
+            query: Termos de busca
+            page: Página (começando em 1)
+            page_size: Resultados por página
+
+        Returns:
+            dict: Total de resultados e lista de segmentos com trecho destacado
+        """
+        match = self._match_expression(query)
+        if not match:
+            return {"total": 0, "results": []}
+
+        conn = self._reader()
+
+        total = conn.execute(
+            "SELECT COUNT(*) FROM segments_fts "
+            "JOIN segments s ON s.id = segments_fts.rowid "
+            "JOIN transcripts t ON t.id = s.transcript_id "
+            "WHERE segments_fts MATCH ? AND t.tenant = ?",
+            (match, tenant)
+        ).fetchone()[0]
+
+        rows = conn.execute(
+            "SELECT t.audio_hash, t.filename, t.language, t.created_at, s.seg_index, s.start_time, s.end_time, "
+            "snippet(segments_fts, 0, '<b>', '</b>', '...', 16) AS snippet, "
+            "bm25(segments_fts) AS rank "
+            "FROM segments_fts "
+            "JOIN segments s ON s.id = segments_fts.rowid "
+            "JOIN transcripts t ON t.id = s.transcript_id "
+            "WHERE segments_fts MATCH ? AND t.tenant = ? "
+            "ORDER BY rank LIMIT ? OFFSET ?",
+            (match, tenant, page_size, (page - 1) * page_size)
+        ).fetchall()
+
+        return {
+            "total": total,
+            "results": [
+                {
+                    "audio_hash": row["audio_hash"],
+                    "filename": row["filename"],
+                    "language": row["language"],
+                    "created_at": row["created_at"],
+                    "segment_index": row["seg_index"],
+                    "start": row["start_time"],
+                    "end": row["end_time"],
+                    "snippet": row["snippet"],
+                    "score": round(-row["rank"], 4),
+                }
+                for row in rows
+            ]
+        }
+
+
+# Instância singleton do armazenamento
+transcript_store = TranscriptStore(settings.TRANSCRIPT_DB_PATH)
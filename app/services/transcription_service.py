@@ -1,11 +1,19 @@
 import time
 import base64
+import hashlib
 import io
 import wave
-import numpy as np
-from openai import OpenAI
+from typing import Optional, TYPE_CHECKING
 from fastapi import UploadFile, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from app.core.config import settings
+from app.core.logger import logger
+from app.core.tracing import span, traced_thread
+from app.services.transcript_store import transcript_store
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+    from app.services.fingerprint import Fingerprint
 
 
 class TranscriptionService:
@@ -14,14 +22,46 @@ class TranscriptionService:
     """
 
     def __init__(self):
-        # Configurar cliente OpenAI com timeout de 10 minutos (600 segundos)
-        self.client = OpenAI(
-            api_key=settings.OPENAI_API_KEY,
-            timeout=600.0,  # 10 minutos para transcrições grandes
-            max_retries=2
-        )
+        # Cliente OpenAI criado no primeiro uso (import do SDK é caro no startup do worker)
+        self._client: Optional["OpenAI"] = None
         self.max_size = 25 * 1024 * 1024  # 25MB em bytes
 
+    @property
+    def client(self) -> "OpenAI":
+        if self._client is None:
+            from openai import OpenAI
+
+            # Configurar cliente OpenAI com timeout de 10 minutos (600 segundos)
+            self._client = OpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                timeout=600.0,  # 10 minutos para transcrições grandes
+                max_retries=2
+            )
+        return self._client
+
+    def warm_up(self) -> None:
+        """
+        Pré-carrega numpy, o cliente OpenAI e o armazenamento local, e exercita a
+        compressão e a impressão digital com um WAV sintético curto
+        """
+        import numpy as np
+        from app.services.fingerprint import compute_fingerprint
+
+        self.client
+        transcript_store.initialize()
+
+        # 1 segundo de tom estéreo 44.1kHz (passa pelos caminhos de mono e downsampling)
+        samples = (np.sin(2 * np.pi * 440 * np.arange(44100) / 44100) * 10000).astype(np.int16)
+        output_wav = io.BytesIO()
+        with wave.open(output_wav, 'wb') as wav_out:
+            wav_out.setnchannels(2)
+            wav_out.setsampwidth(2)
+            wav_out.setframerate(44100)
+            wav_out.writeframes(np.repeat(samples, 2).tobytes())
+
+        self._compress_audio_wav(output_wav.getvalue(), "warmup.wav")
+        compute_fingerprint(output_wav.getvalue())
+
     def _compress_audio_wav(self, audio_bytes: bytes, filename: str) -> tuple[bytes, str]:
         """
         Comprime um arquivo de áudio WAV usando numpy
@@ -34,6 +74,8 @@ class TranscriptionService:
         Returns:
             tuple: (bytes comprimidos, novo filename)
         """
+        import numpy as np
+
         try:
             # Ler o arquivo WAV
             input_wav = io.BytesIO(audio_bytes)
@@ -95,16 +137,139 @@ class TranscriptionService:
                 detail=f"Erro ao comprimir áudio WAV: {str(e)}"
             )
 
-    async def transcribe_audio(self, file: UploadFile) -> dict:
+    @staticmethod
+    def _extract_segments(transcript) -> list[dict]:
+        """
+        Extrai os segmentos (início, fim e texto) da resposta verbose_json do Whisper
+        """
+        segments = []
+        for segment in getattr(transcript, "segments", None) or []:
+            if isinstance(segment, dict):
+                start, end, text = segment.get("start"), segment.get("end"), segment.get("text", "")
+            else:
+                start, end, text = segment.start, segment.end, segment.text
+            segments.append({"start": start, "end": end, "text": text})
+        return segments
+
+    def _find_reusable(self, audio_bytes: bytes, audio_hash: str, tenant: Optional[str], file_extension: str) -> tuple[Optional[dict], Optional["Fingerprint"]]:
+        """
+        Procura uma transcrição já armazenada para o mesmo áudio (hash exato ou impressão digital)
+
+        Returns:
+            tuple: (resultado reaproveitado ou None, impressão digital calculada ou None)
+        """
+        if tenant is None:
+            return None, None
+
+        try:
+            with span("reuse_lookup_hash"):
+                stored = transcript_store.get(audio_hash, tenant)
+            if stored is not None:
+                logger.info(f"Transcrição reaproveitada (hash idêntico): {audio_hash}")
+                return stored, None
+
+            # Impressão digital perceptual só é possível para WAV (decodificado com numpy)
+            if not settings.FINGERPRINT_ENABLED or file_extension != "wav":
+                return None, None
+
+            from app.services.fingerprint import compute_fingerprint
+
+            with span("fingerprint", size=len(audio_bytes)):
+                fingerprint = compute_fingerprint(audio_bytes, settings.FINGERPRINT_MAX_SECONDS)
+            if fingerprint is None:
+                return None, None
+
+            with span("reuse_lookup_fingerprint"):
+                similar = transcript_store.find_similar(tenant, fingerprint, settings.FINGERPRINT_MATCH_THRESHOLD)
+            if similar is None:
+                return None, fingerprint
+
+            logger.info(
+                f"Transcrição reaproveitada (gravação equivalente {similar['audio_hash']}, "
+                f"similaridade {similar['similarity']:.2f}, deslocamento {similar['offset']:.2f}s): {audio_hash}"
+            )
+            return self._shift_transcript(similar, similar["offset"], fingerprint.duration), fingerprint
+
+        except Exception as e:
+            logger.error(f"Erro ao procurar transcrição armazenada {audio_hash}: {str(e)}")
+            return None, None
+
+    @staticmethod
+    def _shift_transcript(stored: dict, offset: float, duration: float) -> dict:
+        """
+        Ajusta os timestamps da transcrição armazenada para a linha do tempo do áudio recebido,
+        descartando os segmentos que ficaram fora do trecho recebido
+        """
+        if not stored["segments"] or stored["segments"][0]["start"] is None:
+            return stored
+
+        segments = []
+        for segment in stored["segments"]:
+            start = segment["start"] - offset
+            end = segment["end"] - offset
+            if end <= 0 or start >= duration:
+                continue
+            segments.append({"start": round(max(start, 0.0), 2), "end": round(min(end, duration), 2), "text": segment["text"]})
+
+        return {
+            "text": " ".join(segment["text"].strip() for segment in segments),
+            "language": stored["language"],
+            "segments": segments
+        }
+
+    def _reused_result(self, reused: dict, audio_hash: str, tenant: str, filename: str, fingerprint: Optional["Fingerprint"], start_time: float) -> dict:
+        """
+        Monta a resposta a partir de uma transcrição reaproveitada e a armazena sob o novo hash
+        """
+        if fingerprint is not None:
+            transcript_store.save(
+                audio_hash=audio_hash,
+                tenant=tenant,
+                filename=filename,
+                text=reused["text"],
+                language=reused["language"],
+                segments=reused["segments"],
+                fingerprint=fingerprint
+            )
+
+        return {
+            "text": reused["text"],
+            "language": reused["language"],
+            "duration": round(time.time() - start_time, 2),
+            "compressed": False,
+            "reused": True
+        }
+
+    def _store_transcript(self, audio_hash: str, tenant: Optional[str], filename: str, transcript, segments: list[dict], fingerprint: Optional["Fingerprint"] = None) -> None:
+        """
+        Enfileira a transcrição para o armazenamento local (falhas não afetam a resposta)
+        """
+        if tenant is None:
+            return
+        try:
+            transcript_store.save(
+                audio_hash=audio_hash,
+                tenant=tenant,
+                filename=filename,
+                text=transcript.text,
+                language=getattr(transcript, "language", None),
+                segments=segments,
+                fingerprint=fingerprint
+            )
+        except Exception as e:
+            logger.error(f"Erro ao armazenar transcrição {audio_hash}: {str(e)}")
+
+    async def transcribe_audio(self, file: UploadFile, tenant: Optional[str] = None) -> dict:
         """
         Transcreve um arquivo de áudio usando o modelo Whisper da OpenAI
         Se o arquivo for maior que 25MB, será automaticamente comprimido
 
         Args:
             file: Arquivo de áudio enviado
+            tenant: Identificador do tenant (claim `sub` do JWT) para armazenar a transcrição
 
         Returns:
-            dict: Dicionário contendo o texto transcrito, idioma, duração e se foi comprimido
+            dict: Dicionário contendo o texto transcrito, idioma, duração, se foi comprimido e se foi reaproveitado
 
         Raises:
             HTTPException: Se houver erro na transcrição
@@ -120,9 +285,19 @@ class TranscriptionService:
             )
 
         # Ler o arquivo
-        audio_bytes = await file.read()
+        with span("read_upload"):
+            audio_bytes = await file.read()
         file_size = len(audio_bytes)
         filename = file.filename or f"audio.{file_extension}"
+        with span("sha256", size=len(audio_bytes)):
+            audio_hash = hashlib.sha256(audio_bytes).hexdigest()
+
+        # Reaproveitar transcrição de um áudio idêntico ou equivalente já processado
+        lookup_start = time.time()
+        # Hash no SQLite e impressão digital (numpy) rodam fora do event loop
+        reused, fingerprint = await run_in_threadpool(traced_thread(self._find_reusable), audio_bytes, audio_hash, tenant, file_extension)
+        if reused is not None:
+            return self._reused_result(reused, audio_hash, tenant, filename, fingerprint, lookup_start)
 
         compressed = False
 
@@ -132,7 +307,8 @@ class TranscriptionService:
             if file_extension == "wav":
                 compressed = True
                 original_size = file_size
-                audio_bytes, filename = self._compress_audio_wav(audio_bytes, filename)
+                with span("compress_wav", size=file_size):
+                    audio_bytes, filename = self._compress_audio_wav(audio_bytes, filename)
                 file_size = len(audio_bytes)
 
                 # Verificar se ainda está muito grande após compressão
@@ -156,19 +332,25 @@ class TranscriptionService:
             audio_file.name = filename
 
             # Transcrever o áudio usando Whisper
-            transcript = self.client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="verbose_json"
-            )
+            with span("whisper_api", size=file_size):
+                transcript = self.client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=audio_file,
+                    response_format="verbose_json"
+                )
 
             duration = time.time() - start_time
 
+            segments = self._extract_segments(transcript)
+            with span("store_enqueue"):
+                self._store_transcript(audio_hash, tenant, filename, transcript, segments, fingerprint)
+
             return {
                 "text": transcript.text,
                 "language": getattr(transcript, "language", None),
                 "duration": round(duration, 2),
-                "compressed": compressed
+                "compressed": compressed,
+                "reused": False
             }
 
         except Exception as e:
@@ -195,7 +377,7 @@ class TranscriptionService:
                 detail=f"Erro ao transcrever áudio: {error_message}"
             )
 
-    async def transcribe_audio_base64(self, audio_base64: str, filename: str) -> dict:
+    async def transcribe_audio_base64(self, audio_base64: str, filename: str, tenant: Optional[str] = None) -> dict:
         """
         Transcreve um arquivo de áudio a partir de uma string base64
         Se o arquivo for maior que 25MB, será automaticamente comprimido
@@ -203,9 +385,10 @@ class TranscriptionService:
         Args:
             audio_base64: String base64 do áudio
             filename: Nome do arquivo com extensão
+            tenant: Identificador do tenant (claim `sub` do JWT) para armazenar a transcrição
 
         Returns:
-            dict: Dicionário contendo o texto transcrito, idioma, duração e se foi comprimido
+            dict: Dicionário contendo o texto transcrito, idioma, duração, se foi comprimido e se foi reaproveitado
 
         Raises:
             HTTPException: Se houver erro na transcrição
@@ -236,7 +419,8 @@ class TranscriptionService:
 
         try:
             # Decodificar base64
-            audio_bytes = base64.b64decode(audio_base64, validate=True)
+            with span("base64_decode", size=len(audio_base64)):
+                audio_bytes = base64.b64decode(audio_base64, validate=True)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -244,6 +428,15 @@ class TranscriptionService:
             )
 
         file_size = len(audio_bytes)
+        with span("sha256", size=len(audio_bytes)):
+            audio_hash = hashlib.sha256(audio_bytes).hexdigest()
+
+        # Reaproveitar transcrição de um áudio idêntico ou equivalente já processado
+        lookup_start = time.time()
+        # Hash no SQLite e impressão digital (numpy) rodam fora do event loop
+        reused, fingerprint = await run_in_threadpool(traced_thread(self._find_reusable), audio_bytes, audio_hash, tenant, file_extension)
+        if reused is not None:
+            return self._reused_result(reused, audio_hash, tenant, filename, fingerprint, lookup_start)
         compressed = False
 
         # Se o arquivo for maior que 25MB, tentar comprimir
@@ -252,7 +445,8 @@ class TranscriptionService:
             if file_extension == "wav":
                 compressed = True
                 original_size = file_size
-                audio_bytes, filename = self._compress_audio_wav(audio_bytes, filename)
+                with span("compress_wav", size=file_size):
+                    audio_bytes, filename = self._compress_audio_wav(audio_bytes, filename)
                 file_size = len(audio_bytes)
 
                 # Verificar se ainda está muito grande após compressão
@@ -276,19 +470,25 @@ class TranscriptionService:
             audio_file.name = filename
 
             # Transcrever o áudio usando Whisper
-            transcript = self.client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="verbose_json"
-            )
+            with span("whisper_api", size=file_size):
+                transcript = self.client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=audio_file,
+                    response_format="verbose_json"
+                )
 
             duration = time.time() - start_time
 
+            segments = self._extract_segments(transcript)
+            with span("store_enqueue"):
+                self._store_transcript(audio_hash, tenant, filename, transcript, segments, fingerprint)
+
             return {
                 "text": transcript.text,
                 "language": getattr(transcript, "language", None),
                 "duration": round(duration, 2),
-                "compressed": compressed
+                "compressed": compressed,
+                "reused": False
             }
 
         except Exception as e:
@@ -0,0 +1,219 @@
+"""
+Benchmark do reaproveitamento por impressão digital (compute_fingerprint + find_similar)
+
+Monta um índice com N assinaturas de um tenant: impressões sintéticas aleatórias (custo
+de índice e de busca), gravações reais não relacionadas (distratores) e as gravações
+originais. Metade das originais é armazenada completa e metade já recortada (12s a 48s).
+Para cada original consulta variantes que devem ser reaproveitadas (re-encode 44.1kHz
+estéreo, 8 bits a 8kHz, recortes, ruído) e casos que não devem (áudio mais longo que o
+armazenado, trecho que ultrapassa o fim, gravação que só compartilha a primeira metade),
+e consulta gravações novas e suas variantes para contar falsos reaproveitamentos.
+
+As gravações são fala sintética (sílabas com harmônicos e formantes aleatórios), então
+os números comparam versões do algoritmo, não substituem uma avaliação com áudio real.
+Um trecho menor que `FINGERPRINT_MATCH_THRESHOLD` vezes a gravação armazenada fica abaixo
+do limiar de similaridade por construção: o caso "1/3 do armazenado" é só informativo e
+não entra no recall.
+
+Uso:
+    python scripts/bench_fingerprint.py --index 100000 --originals 40
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Configuração mínima para importar os módulos da aplicação fora do servidor
+for name, value in {"OPENAI_API_KEY": "sk-bench", "SECRET_KEY": "bench", "ADMIN_USERNAME": "admin", "ADMIN_PASSWORD": "bench"}.items():
+    os.environ.setdefault(name, value)
+
+from app.core.config import settings  # noqa: E402
+from app.services.fingerprint import NUM_PERMUTATIONS, WINDOW_SECONDS, Fingerprint, compute_fingerprint  # noqa: E402
+from app.services.transcript_store import TranscriptStore  # noqa: E402
+
+SAMPLE_RATE = 16000
+TENANT = "bench"
+
+
+def synth_speech(seconds: float, seed: int) -> np.ndarray:
+    """
+    Sinal parecido com fala: sílabas curtas com harmônicos de f0 moldados por formantes
+    """
+    rng = np.random.RandomState(seed)
+    total = int(seconds * SAMPLE_RATE)
+    syllables = []
+    length = 0
+    while length < total:
+        n = int(rng.uniform(0.08, 0.3) * SAMPLE_RATE)
+        t = np.arange(n) / SAMPLE_RATE
+        f0 = rng.uniform(90, 250)
+        syllable = np.zeros(n)
+        for harmonic in range(1, 12):
+            formant = rng.choice([500, 1500, 2500])
+            syllable += rng.uniform(0, 1) * np.exp(-((harmonic * f0 - formant) / 600) ** 2) * np.sin(2 * np.pi * harmonic * f0 * t)
+        if rng.rand() < 0.2:
+            syllable *= 0.05  # pausas
+        syllables.append(syllable * np.hanning(n))
+        length += n
+    signal = np.concatenate(syllables)[:total]
+    return signal / np.abs(signal).max()
+
+
+def to_wav(signal: np.ndarray, rate: int = SAMPLE_RATE, channels: int = 1, width: int = 2) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_out:
+        wav_out.setnchannels(channels)
+        wav_out.setsampwidth(width)
+        wav_out.setframerate(rate)
+        if width == 2:
+            data = (np.clip(signal, -1, 1) * 32000).astype(np.int16)
+        else:
+            data = (np.clip(signal, -1, 1) * 127 + 128).astype(np.uint8)
+        if channels == 2:
+            data = np.repeat(data, 2)
+        wav_out.writeframes(data.tobytes())
+    return buffer.getvalue()
+
+
+def resample(signal: np.ndarray, rate: int) -> np.ndarray:
+    n = int(len(signal) * rate / SAMPLE_RATE)
+    return np.interp(np.arange(n) * SAMPLE_RATE / rate, np.arange(len(signal)), signal)
+
+
+def variants(signal: np.ndarray, rng: np.random.RandomState) -> dict:
+    """
+    Versões equivalentes de uma gravação (todas devem reaproveitar a transcrição)
+    """
+    noisy = signal + rng.normal(0, 0.05, len(signal))  # SNR ~20dB
+    return {
+        "re-encode 44.1kHz estéreo": to_wav(resample(signal, 44100), 44100, channels=2),
+        "8 bits 8kHz": to_wav(resample(signal, 8000), 8000, width=1),
+        "recorte 3s": to_wav(signal[3 * SAMPLE_RATE:]),
+        "recorte 5s/2s + ruído": to_wav(noisy[5 * SAMPLE_RATE:-2 * SAMPLE_RATE]),
+        "ruído (SNR ~20dB)": to_wav(noisy),
+    }
+
+
+def random_fingerprint(rng: np.random.RandomState, seconds: float) -> Fingerprint:
+    n_windows = int(np.ceil(seconds / WINDOW_SECONDS))
+    return Fingerprint(
+        signature=rng.randint(0, (1 << 31) - 1, NUM_PERMUTATIONS).astype(np.uint64),
+        times=(rng.rand(NUM_PERMUTATIONS) * seconds).astype(np.float32),
+        duration=seconds,
+        windows=rng.randint(0, (1 << 31) - 1, (n_windows, NUM_PERMUTATIONS)).astype(np.uint64)
+    )
+
+
+def percentile_ms(samples: list[float], q: float) -> float:
+    return float(np.percentile(samples, q)) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark do reaproveitamento por impressão digital")
+    parser.add_argument("--index", type=int, default=100_000, help="Total de assinaturas no índice do tenant")
+    parser.add_argument("--originals", type=int, default=40, help="Gravações originais consultadas")
+    parser.add_argument("--distractors", type=int, default=1000, help="Gravações reais não relacionadas no índice")
+    parser.add_argument("--seconds", type=int, default=60, help="Duração das gravações sintéticas")
+    parser.add_argument("--threshold", type=float, default=settings.FINGERPRINT_MATCH_THRESHOLD)
+    parser.add_argument("--seed", type=int, default=20240501)
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(args.seed)
+    seconds = args.seconds
+    half = seconds // 2 * SAMPLE_RATE
+
+    with tempfile.TemporaryDirectory(prefix="bench-fingerprint-") as tmp_dir:
+        store = TranscriptStore(os.path.join(tmp_dir, "transcripts.db"))
+
+        def store_fingerprint(name: str, fingerprint: Fingerprint) -> None:
+            store.save(audio_hash=name, tenant=TENANT, filename=f"{name}.wav", text="x", language="pt", segments=[], fingerprint=fingerprint)
+
+        load_start = time.perf_counter()
+        originals = [synth_speech(seconds, seed) for seed in range(args.originals)]
+        for index, signal in enumerate(originals):
+            stored = signal if index % 2 == 0 else signal[12 * SAMPLE_RATE:48 * SAMPLE_RATE]
+            store_fingerprint(f"original-{index}", compute_fingerprint(to_wav(stored)))
+        for index in range(args.distractors):
+            store_fingerprint(f"distractor-{index}", compute_fingerprint(to_wav(synth_speech(seconds, 100_000 + index))))
+        for index in range(max(args.index - args.originals - args.distractors, 0)):
+            store_fingerprint(f"synthetic-{index}", random_fingerprint(rng, seconds))
+        store.flush()
+        print(f"Índice: {args.index:,} assinaturas carregadas em {time.perf_counter() - load_start:.0f}s "
+              f"(limiar {args.threshold}, gravações de {seconds}s)")
+
+        results: dict[str, list[bool]] = {}
+        false_matches = 0
+        fingerprint_latency = []
+        lookup_latency = []
+
+        def query(audio: bytes) -> dict:
+            started = time.perf_counter()
+            fingerprint = compute_fingerprint(audio)
+            fingerprint_latency.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            similar = store.find_similar(TENANT, fingerprint, args.threshold)
+            lookup_latency.append(time.perf_counter() - started)
+            return similar
+
+        for index, signal in enumerate(originals):
+            expected = f"original-{index}"
+            if index % 2 == 0:
+                cases = {name: (audio, True) for name, audio in variants(signal, rng).items()}
+                cases["trecho 20s-40s (1/3 do armazenado)"] = (to_wav(signal[20 * SAMPLE_RATE:40 * SAMPLE_RATE]), None)
+                shared = np.concatenate([signal[:half], synth_speech(seconds, 200_000 + index)[half:]])
+                cases["só a 1ª metade em comum"] = (to_wav(shared), False)
+            else:
+                cases = {
+                    "trecho 20s-40s (armazenado 12s-48s)": (to_wav(signal[20 * SAMPLE_RATE:40 * SAMPLE_RATE]), True),
+                    "mais longo que o armazenado": (to_wav(signal), False),
+                    "ultrapassa o fim (30s-58s)": (to_wav(signal[30 * SAMPLE_RATE:58 * SAMPLE_RATE]), False),
+                }
+            for name, (audio, should_match) in cases.items():
+                similar = query(audio)
+                found = similar is not None and similar["audio_hash"] == expected
+                if similar is not None and (not found or should_match is False):
+                    false_matches += 1
+                if should_match is None:
+                    results.setdefault("informativo: " + name, []).append(found)
+                elif should_match:
+                    results.setdefault("reaproveitar: " + name, []).append(found)
+                else:
+                    results.setdefault("recusar: " + name, []).append(similar is None)
+
+        for index in range(args.originals):
+            signal = synth_speech(seconds, 300_000 + index)
+            for audio in [to_wav(signal)] + list(variants(signal, rng).values()):
+                rejected = query(audio) is None
+                false_matches += not rejected
+                results.setdefault("recusar: gravações novas e variantes", []).append(rejected)
+        store.close()
+
+    print()
+    print(f"{'caso':52s} {'acertos':>9s}")
+    for name, outcomes in results.items():
+        print(f"{name:52s} {sum(outcomes):>4d}/{len(outcomes):<4d}")
+
+    reuse_cases = [outcomes for name, outcomes in results.items() if name.startswith("reaproveitar")]
+    true_matches = sum(sum(outcomes) for outcomes in reuse_cases)
+    expected_matches = sum(len(outcomes) for outcomes in reuse_cases)
+    matched = true_matches + false_matches
+    print()
+    print(f"precisão {true_matches / matched if matched else 1.0:.3f} ({false_matches} reaproveitamentos errados), "
+          f"recall {true_matches / expected_matches:.3f} ({true_matches}/{expected_matches})")
+    print(f"compute_fingerprint ({seconds}s ou menos): p50 {percentile_ms(fingerprint_latency, 50):.1f}ms, "
+          f"p99 {percentile_ms(fingerprint_latency, 99):.1f}ms")
+    print(f"find_similar: p50 {percentile_ms(lookup_latency, 50):.2f}ms, p99 {percentile_ms(lookup_latency, 99):.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Benchmark de inicialização: import da aplicação e latência das primeiras requisições
+
+Para cada modo (WARMUP_ON_STARTUP desligado e ligado) mede:
+- `import app.main` em um interpretador novo (mediana de várias execuções)
+- tempo do spawn do uvicorn até o primeiro `/health` respondido
+- latência do primeiro e do segundo `/health`
+- latência da primeira e da segunda transcrição (`/transcription/base64`)
+
+A API da OpenAI é substituída por um servidor HTTP local que responde na hora no
+formato verbose_json, então a latência medida é só a do serviço (imports tardios,
+criação do cliente, decodificação, impressão digital, compressão), sem rede externa.
+
+Uso:
+    python scripts/bench_startup.py --runs 5
+"""
+import argparse
+import base64
+import http.client
+import io
+import json
+import math
+import os
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "bench"
+
+BASE_ENV = {
+    "OPENAI_API_KEY": "sk-bench",
+    "SECRET_KEY": "bench-secret",
+    "ADMIN_USERNAME": ADMIN_USERNAME,
+    "ADMIN_PASSWORD": ADMIN_PASSWORD,
+    "PYTHONPATH": str(ROOT),
+}
+
+
+class FakeWhisperHandler(BaseHTTPRequestHandler):
+    """
+    Responde a /v1/audio/transcriptions como o Whisper (verbose_json), sem transcrever
+    """
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({
+            "text": "teste de inicialização",
+            "language": "portuguese",
+            "duration": 2.0,
+            "segments": [{"id": 0, "start": 0.0, "end": 2.0, "text": "teste de inicialização"}],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def build_wav(frequency: float, seconds: float = 2.0) -> bytes:
+    """
+    WAV 16kHz mono com um tom; frequências diferentes evitam o reaproveitamento de transcrições
+    """
+    sample_rate = 16000
+    frames = b"".join(
+        struct.pack("<h", int(8000 * math.sin(2 * math.pi * frequency * i / sample_rate)))
+        for i in range(int(seconds * sample_rate))
+    )
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_out:
+        wav_out.setnchannels(1)
+        wav_out.setsampwidth(2)
+        wav_out.setframerate(sample_rate)
+        wav_out.writeframes(frames)
+    return buffer.getvalue()
+
+
+def timed_request(port: int, method: str, path: str, body: dict = None, headers: dict = None) -> tuple[float, int, bytes]:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    payload = json.dumps(body).encode() if body is not None else b""
+    started = time.perf_counter()
+    try:
+        conn.request(method, path, body=payload, headers={"Content-Type": "application/json", **(headers or {})})
+        response = conn.getresponse()
+        data = response.read()
+    finally:
+        conn.close()
+    return time.perf_counter() - started, response.status, data
+
+
+def measure_import(env: dict, runs: int, cwd: str) -> float:
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True, check=True).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def measure_server(env: dict, data_dir: str) -> dict:
+    port = free_port()
+    spawned = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=data_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        # Pronto = primeiro /health respondido (o warm-up roda antes do worker aceitar conexões)
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError("O servidor encerrou durante a inicialização")
+            try:
+                timed_request(port, "GET", "/health")
+                break
+            except OSError:
+                time.sleep(0.01)
+        ready = time.perf_counter() - spawned
+
+        health_1, _, _ = timed_request(port, "GET", "/health")
+        health_2, _, _ = timed_request(port, "GET", "/health")
+
+        _, status, data = timed_request(port, "POST", "/auth/token", {"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+        headers = {"Authorization": f"Bearer {json.loads(data)['access_token']}"}
+
+        transcriptions = []
+        for frequency in (440.0, 660.0):
+            body = {"audio_base64": base64.b64encode(build_wav(frequency)).decode(), "filename": "bench.wav"}
+            elapsed, status, data = timed_request(port, "POST", "/transcription/base64", body, headers)
+            if status != 200:
+                raise RuntimeError(f"Transcrição falhou: {status} {data[:200]!r}")
+            transcriptions.append(elapsed)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    return {
+        "ready": ready,
+        "health_1": health_1,
+        "health_2": health_2,
+        "transcription_1": transcriptions[0],
+        "transcription_2": transcriptions[1],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização da API")
+    parser.add_argument("--runs", type=int, default=5, help="Execuções por medida (mediana)")
+    args = parser.parse_args()
+
+    whisper = ThreadingHTTPServer(("127.0.0.1", 0), FakeWhisperHandler)
+    threading.Thread(target=whisper.serve_forever, daemon=True).start()
+
+    results = {}
+    try:
+        for warmup in ("false", "true"):
+            runs = []
+            import_seconds = None
+            for run in range(args.runs):
+                with tempfile.TemporaryDirectory(prefix="bench-startup-") as data_dir:
+                    env = {
+                        **os.environ,
+                        **BASE_ENV,
+                        "WARMUP_ON_STARTUP": warmup,
+                        "OPENAI_BASE_URL": f"http://127.0.0.1:{whisper.server_port}/v1",
+                        "TRANSCRIPT_DB_PATH": os.path.join(data_dir, "transcripts.db"),
+                        "API_KEYS_DB_PATH": os.path.join(data_dir, "api_keys.db"),
+                    }
+                    if import_seconds is None:
+                        import_seconds = measure_import(env, args.runs, data_dir)
+                    runs.append(measure_server(env, data_dir))
+            results[warmup] = (import_seconds, {key: statistics.median(run[key] for run in runs) for key in runs[0]})
+    finally:
+        whisper.shutdown()
+
+    labels = {
+        "ready": "spawn -> primeiro /health",
+        "health_1": "1º /health",
+        "health_2": "2º /health",
+        "transcription_1": "1ª transcrição (2s WAV)",
+        "transcription_2": "2ª transcrição (2s WAV)",
+    }
+    print(f"Medianas de {args.runs} execuções (ms)")
+    print(f"{'':32s} {'warm-up off':>12s} {'warm-up on':>12s}")
+    print(f"{'import app.main':32s} {results['false'][0] * 1000:12.0f} {results['true'][0] * 1000:12.0f}")
+    for key, label in labels.items():
+        print(f"{label:32s} {results['false'][1][key] * 1000:12.1f} {results['true'][1][key] * 1000:12.1f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Benchmark da busca full-text de transcrições (TranscriptStore.search)
+
+Carrega N segmentos sintéticos (vocabulário com distribuição de Zipf, como fala real)
+distribuídos entre vários tenants, usando o mesmo caminho de escrita da API
+(`save` + thread de escrita em lote), e mede a latência da busca para termos
+comuns, raros, consultas com dois termos e páginas mais profundas.
+
+Uso:
+    python scripts/bench_transcript_search.py --segments 1000000 --tenants 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Configuração mínima para importar os módulos da aplicação fora do servidor
+for name, value in {"OPENAI_API_KEY": "sk-bench", "SECRET_KEY": "bench", "ADMIN_USERNAME": "admin", "ADMIN_PASSWORD": "bench"}.items():
+    os.environ.setdefault(name, value)
+
+from app.services.transcript_store import TranscriptStore  # noqa: E402
+
+SEGMENTS_PER_TRANSCRIPT = 100
+WORDS_PER_SEGMENT = (6, 18)
+
+
+def build_vocabulary(size: int, rng: np.random.RandomState) -> list[str]:
+    """
+    Palavras sintéticas pronunciáveis (sílabas consoante + vogal), todas distintas
+    """
+    consonants = "bcdfgjlmnprstv"
+    vowels = "aeiou"
+    words = set()
+    while len(words) < size:
+        n_syllables = rng.randint(2, 5)
+        words.add("".join(consonants[rng.randint(len(consonants))] + vowels[rng.randint(len(vowels))] for _ in range(n_syllables)))
+    return sorted(words)
+
+
+def percentile_ms(samples: list[float], q: float) -> float:
+    return float(np.percentile(samples, q)) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark da busca full-text de transcrições")
+    parser.add_argument("--segments", type=int, default=1_000_000, help="Total de segmentos armazenados")
+    parser.add_argument("--tenants", type=int, default=20, help="Número de tenants")
+    parser.add_argument("--vocabulary", type=int, default=50_000, help="Tamanho do vocabulário")
+    parser.add_argument("--queries", type=int, default=200, help="Consultas por categoria")
+    parser.add_argument("--db", help="Caminho do banco (padrão: diretório temporário, removido ao final)")
+    parser.add_argument("--seed", type=int, default=20240501)
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(args.seed)
+    vocabulary = build_vocabulary(args.vocabulary, rng)
+
+    # Zipf: a palavra de posição r aparece com frequência ~ 1/r
+    weights = 1.0 / np.arange(1, len(vocabulary) + 1)
+    weights /= weights.sum()
+
+    with tempfile.TemporaryDirectory(prefix="bench-search-") as tmp_dir:
+        db_path = args.db or os.path.join(tmp_dir, "transcripts.db")
+        store = TranscriptStore(db_path)
+
+        print(f"Carregando {args.segments:,} segmentos em {args.tenants} tenants...")
+        n_transcripts = args.segments // SEGMENTS_PER_TRANSCRIPT
+        load_start = time.perf_counter()
+        for i in range(n_transcripts):
+            lengths = rng.randint(WORDS_PER_SEGMENT[0], WORDS_PER_SEGMENT[1] + 1, size=SEGMENTS_PER_TRANSCRIPT)
+            word_ids = rng.choice(len(vocabulary), size=int(lengths.sum()), p=weights)
+            segments = []
+            position = 0
+            for index, length in enumerate(lengths):
+                text = " ".join(vocabulary[w] for w in word_ids[position:position + length])
+                position += length
+                segments.append({"start": index * 5.0, "end": index * 5.0 + 5.0, "text": text})
+            store.save(
+                audio_hash=f"bench-{i:08d}",
+                tenant=f"tenant-{i % args.tenants}",
+                filename=f"audio-{i}.wav",
+                text=" ".join(segment["text"] for segment in segments),
+                language="pt",
+                segments=segments
+            )
+        store.flush()
+        load_seconds = time.perf_counter() - load_start
+        db_mb = sum(f.stat().st_size for f in Path(db_path).parent.glob(Path(db_path).name + "*")) / 1024 / 1024
+        print(f"Carga: {load_seconds:.1f}s ({args.segments / load_seconds:,.0f} segmentos/s), banco {db_mb:.0f}MB")
+
+        # Termos por faixa de frequência (posição no ranking de Zipf)
+        bands = {
+            "comum (top 10)": vocabulary[:10],
+            "médio (rank 100-1000)": vocabulary[100:1000],
+            "raro (rank > 20000)": vocabulary[20000:],
+        }
+        categories = {}
+        for label, terms in bands.items():
+            categories[label] = [terms[rng.randint(len(terms))] for _ in range(args.queries)]
+        categories["dois termos (comum + médio)"] = [
+            f"{vocabulary[rng.randint(10)]} {vocabulary[rng.randint(100, 1000)]}" for _ in range(args.queries)
+        ]
+
+        print()
+        print(f"{'consulta':30s} {'p50 ms':>8s} {'p99 ms':>8s} {'máx ms':>8s} {'resultados (mediana)':>22s}")
+        for label, queries in categories.items():
+            for page in (1, 5):
+                latencies = []
+                totals = []
+                for n, query in enumerate(queries):
+                    tenant = f"tenant-{n % args.tenants}"
+                    started = time.perf_counter()
+                    result = store.search(tenant, query, page=page, page_size=20)
+                    latencies.append(time.perf_counter() - started)
+                    totals.append(result["total"])
+                name = label if page == 1 else f"  página {page}"
+                print(f"{name:30s} {percentile_ms(latencies, 50):8.2f} {percentile_ms(latencies, 99):8.2f} "
+                      f"{max(latencies) * 1000:8.2f} {int(np.median(totals)):>22,}")
+
+        store.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
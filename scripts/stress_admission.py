@@ -0,0 +1,261 @@
+"""
+Teste de carga do controle de admissão
+
+Sobe a API em um processo separado (uvicorn) com um orçamento de admissão pequeno,
+dispara muitos uploads grandes em paralelo para /transcription/base64 e mede o pico
+de memória (RSS) do servidor e quantas requisições foram admitidas ou descartadas.
+
+A chamada ao Whisper aponta para uma porta fechada (OPENAI_BASE_URL), então nenhuma
+requisição chega à OpenAI: o teste exercita apenas leitura do corpo, decodificação,
+hash, impressão digital e compressão, que são as etapas que consomem memória.
+
+Uso:
+    python scripts/stress_admission.py --requests 60 --size-mb 40 --concurrency 30 --budget-mb 256
+"""
+import argparse
+import base64
+import http.client
+import io
+import json
+import math
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "stress-test"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def build_wav(size_mb: float) -> bytes:
+    """
+    Gera um WAV 16kHz mono 16-bit (tom com variação de frequência) com aproximadamente `size_mb`
+    """
+    sample_rate = 16000
+    n_samples = int(size_mb * 1024 * 1024 / 2)
+    period = sample_rate * 2
+    block = b"".join(
+        struct.pack("<h", int(8000 * math.sin(2 * math.pi * (300 + i / 40) * i / sample_rate)))
+        for i in range(period)
+    )
+    frames = (block * (n_samples // period + 1))[:n_samples * 2]
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_out:
+        wav_out.setnchannels(1)
+        wav_out.setsampwidth(2)
+        wav_out.setframerate(sample_rate)
+        wav_out.writeframes(frames)
+    return buffer.getvalue()
+
+
+def request(port: int, method: str, path: str, body: bytes = b"", headers: dict = None, timeout: float = 600.0) -> tuple[int, bytes]:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        conn.request(method, path, body=body, headers={"Content-Type": "application/json", **(headers or {})})
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+def wait_until_ready(port: int, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("O servidor encerrou durante a inicialização")
+        try:
+            status, _ = request(port, "GET", "/health", timeout=2.0)
+            if status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("O servidor não respondeu a tempo")
+
+
+class RssSampler:
+    """
+    Amostra periodicamente o RSS do processo do servidor (Linux, via /proc)
+    """
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss_kb = 0
+        self.samples: list[tuple[float, int]] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _read(self, field: str) -> int:
+        with open(f"/proc/{self.pid}/status") as status_file:
+            for line in status_file:
+                if line.startswith(field):
+                    return int(line.split()[1])
+        return 0
+
+    def _run(self) -> None:
+        started = time.monotonic()
+        while not self._stop.wait(self.interval):
+            try:
+                rss = self._read("VmRSS:")
+            except OSError:
+                return
+            self.samples.append((time.monotonic() - started, rss))
+            self.peak_rss_kb = max(self.peak_rss_kb, rss)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> int:
+        self._stop.set()
+        self._thread.join()
+        try:
+            # VmHWM é o pico real do kernel, inclusive entre amostras
+            return max(self.peak_rss_kb, self._read("VmHWM:"))
+        except OSError:
+            return self.peak_rss_kb
+
+
+def start_server(args: argparse.Namespace, port: int, data_dir: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "sk-stress-test",
+        "OPENAI_BASE_URL": "http://127.0.0.1:9/v1",
+        "SECRET_KEY": "stress-test-secret",
+        "ADMIN_USERNAME": ADMIN_USERNAME,
+        "ADMIN_PASSWORD": ADMIN_PASSWORD,
+        "ADMISSION_MAX_INFLIGHT_MB": str(args.budget_mb),
+        "ADMISSION_MAX_QUEUE_DEPTH": str(args.queue_depth),
+        "ADMISSION_MAX_QUEUE_PER_TENANT": str(args.queue_per_tenant),
+        "ADMISSION_QUEUE_TIMEOUT_SECONDS": str(args.queue_timeout),
+        "TRANSCRIPT_DB_PATH": os.path.join(data_dir, "transcripts.db"),
+        "API_KEYS_DB_PATH": os.path.join(data_dir, "api_keys.db"),
+    }
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--log-level", "warning",
+            "--h11-max-incomplete-event-size", str(200 * 1024 * 1024),
+        ],
+        cwd=data_dir,
+        env={**env, "PYTHONPATH": str(ROOT)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL if not args.verbose else None,
+    )
+
+
+def create_tenants(port: int, count: int) -> tuple[list[dict], dict]:
+    """
+    Cria uma API key por tenant simulado (cada key é um tenant diferente no controle de admissão)
+    """
+    status, body = request(port, "POST", "/auth/token", json.dumps({"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}).encode())
+    if status != 200:
+        raise RuntimeError(f"Falha ao obter token: {status} {body[:200]!r}")
+    admin_headers = {"Authorization": f"Bearer {json.loads(body)['access_token']}"}
+
+    tenants = []
+    for i in range(count):
+        status, body = request(port, "POST", "/auth/api-keys", json.dumps({"client_id": f"stress-{i}"}).encode(), admin_headers)
+        if status not in (200, 201):
+            raise RuntimeError(f"Falha ao criar API key: {status} {body[:200]!r}")
+        tenants.append({"X-API-Key": json.loads(body)["api_key"]})
+    return tenants, admin_headers
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga do controle de admissão")
+    parser.add_argument("--requests", type=int, default=60, help="Total de uploads")
+    parser.add_argument("--size-mb", type=float, default=30.0, help="Tamanho do WAV de cada upload (antes do base64)")
+    parser.add_argument("--concurrency", type=int, default=30, help="Uploads simultâneos")
+    parser.add_argument("--tenants", type=int, default=3, help="Número de tenants (API keys) distribuindo os uploads")
+    parser.add_argument("--anonymous", type=int, default=0, help="Uploads extras sem credenciais")
+    parser.add_argument("--budget-mb", type=int, default=256, help="ADMISSION_MAX_INFLIGHT_MB do servidor")
+    parser.add_argument("--queue-depth", type=int, default=50, help="ADMISSION_MAX_QUEUE_DEPTH do servidor")
+    parser.add_argument("--queue-per-tenant", type=int, default=10, help="ADMISSION_MAX_QUEUE_PER_TENANT do servidor")
+    parser.add_argument("--queue-timeout", type=float, default=30.0, help="ADMISSION_QUEUE_TIMEOUT_SECONDS do servidor")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar os logs do servidor")
+    args = parser.parse_args()
+
+    print(f"Gerando payload de {args.size_mb:.0f}MB...")
+    wav = build_wav(args.size_mb)
+    payload = json.dumps({"audio_base64": base64.b64encode(wav).decode(), "filename": "stress.wav"}).encode()
+    del wav
+    print(f"Content-Length por upload: {len(payload) / 1024 / 1024:.1f}MB")
+
+    port = free_port()
+    with tempfile.TemporaryDirectory(prefix="stress-admission-") as data_dir:
+        server = start_server(args, port, data_dir)
+        try:
+            wait_until_ready(port, server)
+            tenants, admin_headers = create_tenants(port, args.tenants)
+            baseline_kb = RssSampler(server.pid)._read("VmRSS:")
+
+            jobs = [tenants[i % len(tenants)] for i in range(args.requests)] + [{}] * args.anonymous
+            results: Counter = Counter()
+            by_tenant: dict[str, Counter] = {}
+            latencies: list[float] = []
+            lock = threading.Lock()
+
+            def upload(headers: dict) -> None:
+                label = headers.get("X-API-Key", "anonymous")[:11]
+                started = time.monotonic()
+                try:
+                    status, _ = request(port, "POST", "/transcription/base64", payload, headers)
+                except OSError as e:
+                    status = type(e).__name__
+                with lock:
+                    results[status] += 1
+                    by_tenant.setdefault(label, Counter())[status] += 1
+                    latencies.append(time.monotonic() - started)
+
+            sampler = RssSampler(server.pid)
+            sampler.start()
+            started = time.monotonic()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                list(executor.map(upload, jobs))
+            elapsed = time.monotonic() - started
+            peak_kb = sampler.stop()
+
+            _, stats_body = request(port, "GET", "/transcription/admission", headers=admin_headers)
+            stats = json.loads(stats_body)
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    budget_kb = args.budget_mb * 1024
+    print()
+    print(f"Uploads: {len(jobs)} em {elapsed:.1f}s (concorrência {args.concurrency}, {args.tenants} tenants, {args.anonymous} anônimos)")
+    print(f"RSS antes da carga: {baseline_kb / 1024:.0f}MB")
+    print(f"RSS de pico:        {peak_kb / 1024:.0f}MB (orçamento de admissão {args.budget_mb}MB, "
+          f"excedente {(peak_kb - baseline_kb - budget_kb) / 1024:+.0f}MB)")
+    print(f"Status HTTP:        {dict(sorted(results.items(), key=str))}")
+    for label, counts in sorted(by_tenant.items()):
+        print(f"  {label}: {dict(sorted(counts.items(), key=str))}")
+    print(f"Latência p50/max:   {sorted(latencies)[len(latencies) // 2]:.2f}s / {max(latencies):.2f}s")
+    print("Admissão:")
+    for key in ("admitted_total", "shed_total", "shed_queue_full", "shed_tenant_limit", "shed_anonymous", "shed_timeout"):
+        print(f"  {key}: {stats.get(key)}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())